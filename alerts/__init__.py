@@ -1,6 +1,6 @@
 """
 Alerts package initialization.
 """
-from alerts.alert_manager import AlertManager, AlertSeverity
+from alerts.alert_manager import Alert, AlertManager, AlertSeverity
 
-__all__ = ['AlertManager', 'AlertSeverity']
+__all__ = ['Alert', 'AlertManager', 'AlertSeverity']
@@ -1,14 +1,54 @@
 """
 Alert generation and prioritization system for security threats.
 """
-import json
+import heapq
+import queue
+import secrets
+import threading
+import time
+import orjson
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Iterator
 from enum import Enum
 from loguru import logger
 from config import Config
 
+# Bound once at import so the per-alert paths skip the attribute lookup
+_utcnow = datetime.utcnow
+_utcfromtimestamp = datetime.utcfromtimestamp
+
+# Severity thresholds are fixed for the process, so read them from Config once
+_HIGH_SEV = Config.HIGH_SEVERITY_THRESHOLD
+_MED_SEV = Config.MEDIUM_SEVERITY_THRESHOLD
+
+
+# Distribution queue markers: flush buffered Slack alerts / stop the worker
+_FLUSH = object()
+_STOP = object()
+
+# Slack attachment color per severity
+_SLACK_COLORS = {
+    'low': '#36a64f',
+    'medium': '#ff9900',
+    'high': '#ff6600',
+    'critical': '#ff0000'
+}
+
+# Event / detection fields kept on an alert. The raw payload (message) is
+# dropped so full log records are not pinned in alert_history, and the
+# alert holds its own copy instead of a reference callers may mutate.
+_EVENT_KEYS = (
+    'source', 'timestamp', 'event_id', 'log_stream', 'activity', 'result_type',
+    'ip_address', 'identity', 'category', 'level'
+)
+_THREAT_KEYS = ('confidence', 'is_threat', 'prediction', 'exceeds_threshold')
+
 
 class AlertSeverity(Enum):
     """Alert severity levels"""
@@ -18,18 +58,147 @@ class AlertSeverity(Enum):
     CRITICAL = "critical"
 
 
+class Alert(Mapping):
+    """
+    Security alert record, as held in the alert history
+    
+    Stored in __slots__ rather than a per-alert dict to keep the alert
+    history compact. Implements the read-only Mapping protocol for the
+    manager's own delivery code; AlertManager methods hand callers plain
+    dict copies (to_dict), so returned alerts stay JSON-serializable and
+    mutable as before.
+    """
+    
+    __slots__ = (
+        'alert_id', 'timestamp', 'timestamp_epoch', 'severity', 'confidence',
+        'source', 'event_timestamp', 'description', 'recommendations',
+        'event_data', 'threat_info', 'status',
+        'acknowledged_at', 'resolved_at', 'resolution_notes'
+    )
+    _FIELDS = frozenset(__slots__)
+    
+    def __init__(self, alert_id: str, timestamp: str, timestamp_epoch: float,
+                 severity: str, confidence: float, source: str, event_timestamp: Any,
+                 description: str, recommendations: Tuple[str, ...],
+                 event_data: Dict, threat_info: Dict, status: str = 'open'):
+        self.alert_id = alert_id
+        self.timestamp = timestamp
+        self.timestamp_epoch = timestamp_epoch
+        self.severity = severity
+        self.confidence = confidence
+        self.source = source
+        self.event_timestamp = event_timestamp
+        self.description = description
+        self.recommendations = recommendations
+        self.event_data = event_data
+        self.threat_info = threat_info
+        self.status = status
+        self.acknowledged_at = None
+        self.resolved_at = None
+        self.resolution_notes = None
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+    
+    def __len__(self) -> int:
+        return len(self.__slots__)
+    
+    def __repr__(self) -> str:
+        return f"Alert({self.alert_id!r}, severity={self.severity!r}, status={self.status!r})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the alert as a plain dictionary"""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
 class AlertManager:
     """Manages security alert generation and distribution"""
     
+    # Confidence at or above which a high severity alert becomes critical
+    CRITICAL_CONFIDENCE = 0.95
+    
+    # Severity for each code returned by _classify_batch
+    _SEVERITY_LEVELS = (
+        AlertSeverity.LOW,
+        AlertSeverity.MEDIUM,
+        AlertSeverity.HIGH,
+        AlertSeverity.CRITICAL,
+    )
+    
+    # Remediation recommendations per severity tier (shared, never mutated)
+    _RECS_HIGH = (
+        "Immediately investigate this event",
+        "Review all recent activities from this source",
+        "Consider blocking the source IP address",
+        "Check for any successful unauthorized access",
+    )
+    _RECS_MEDIUM = (
+        "Review this event during next security review",
+        "Monitor the source for additional suspicious activity",
+        "Verify user identity if applicable",
+    )
+    _RECS_LOW = (
+        "Log for future analysis",
+        "Monitor for pattern escalation",
+    )
+    
+    # Constant part of every Slack attachment
+    _SLACK_ATTACHMENT_TEMPLATE = {
+        'footer': 'Threat Detection System'
+    }
+    
+    # Shared keep-alive session for webhook calls, created on first use
+    _http_session = None
+    _http_session_lock = threading.Lock()
+    
     def __init__(self):
         """Initialize alert manager"""
-        self.alert_history = []
+        self.alert_history = deque(maxlen=Config.ALERT_HISTORY_MAX)
         self.alert_count = {
             'low': 0,
             'medium': 0,
             'high': 0,
             'critical': 0
         }
+        
+        # Guards the alert store: history, indexes, counters and version
+        # change together under it, so concurrent generate_alert and
+        # acknowledge/resolve calls never see or leave it half updated
+        self._store_lock = threading.Lock()
+        
+        # Alerts generated over the manager's lifetime; unlike
+        # len(alert_history) this keeps growing after eviction starts
+        self._alerts_generated = 0
+        
+        # Bumped whenever the alert store changes, so readers can cache
+        # anything derived from it until the version moves
+        self._version = 0
+        
+        # Lookup indexes over alert_history: alerts by ID, and the IDs of
+        # alerts still open, overall and per severity
+        self._by_id = {}
+        self._open_ids = set()
+        self._open_by_severity = {s.value: set() for s in AlertSeverity}
+        
+        # Slack deliveries run on a small worker pool so that a slow webhook
+        # never stalls detection and a burst of alerts is posted concurrently
+        self._notifier = ThreadPoolExecutor(max_workers=4, thread_name_prefix='slack-notifier')
+        
+        # Pending Slack attachments, flushed as a single webhook message
+        self._slack_buffer = []
+        self._slack_lock = threading.Lock()
+        self._slack_timer = None
+        
+        # Alerts are handed to a background worker for distribution so that
+        # generate_alert returns as soon as the alert is recorded
+        self._dist_q = queue.Queue(maxsize=Config.ALERT_QUEUE_SIZE)
+        self._dist_thread = threading.Thread(target=self._dist_worker, daemon=True)
+        self._dist_thread.start()
     
     def generate_alert(self, 
                       event_data: Dict,
@@ -44,37 +213,49 @@ class AlertManager:
             severity: Alert severity (auto-calculated if not provided)
             
         Returns:
-            Alert dictionary
+            Alert dictionary (empty on failure)
         """
         try:
             # Determine severity if not provided
             if severity is None:
                 severity = self._calculate_severity(threat_info)
             
-            alert = {
-                'alert_id': self._generate_alert_id(),
-                'timestamp': datetime.utcnow().isoformat(),
-                'severity': severity.value,
-                'confidence': threat_info.get('confidence', 0.0),
-                'source': event_data.get('source', 'unknown'),
-                'event_timestamp': event_data.get('timestamp', ''),
-                'description': self._generate_description(event_data, threat_info),
-                'recommendations': self._generate_recommendations(severity, threat_info),
-                'event_data': event_data,
-                'threat_info': threat_info,
-                'status': 'open'
-            }
+            # Read the clock once; the epoch copy saves consumers re-parsing the ISO string
+            now = time.time()
+            
+            alert = Alert(
+                alert_id=self._generate_alert_id(),
+                timestamp=_utcfromtimestamp(now).isoformat(),
+                timestamp_epoch=now,
+                severity=severity.value,
+                confidence=threat_info.get('confidence', 0.0),
+                source=event_data.get('source', 'unknown'),
+                event_timestamp=event_data.get('timestamp', ''),
+                description=self._generate_description(event_data, threat_info),
+                recommendations=self._generate_recommendations(severity, threat_info),
+                event_data={k: event_data[k] for k in _EVENT_KEYS if k in event_data},
+                threat_info={k: threat_info[k] for k in _THREAT_KEYS if k in threat_info}
+            )
             
-            # Add to history
-            self.alert_history.append(alert)
-            self.alert_count[severity.value] += 1
+            with self._store_lock:
+                # Add to history, evicting the oldest alert once the cap is reached
+                if len(self.alert_history) == self.alert_history.maxlen:
+                    self._forget(self.alert_history[0])
+                self.alert_history.append(alert)
+                self._by_id[alert.alert_id] = alert
+                self._open_ids.add(alert.alert_id)
+                self._open_by_severity[alert.severity].add(alert.alert_id)
+                self.alert_count[severity.value] += 1
+                self._alerts_generated += 1
+                self._version += 1
             
-            logger.warning(f"Generated {severity.value} severity alert: {alert['alert_id']}")
+            # Positional args: loguru only formats the message if a sink accepts it
+            logger.warning("Generated {} severity alert: {}", severity.value, alert.alert_id)
             
             # Distribute alert
             self._distribute_alert(alert)
             
-            return alert
+            return alert.to_dict()
             
         except Exception as e:
             logger.error(f"Error generating alert: {e}")
@@ -95,16 +276,30 @@ class AlertManager:
         """
         alerts = []
         
+        # Classify the whole batch at once instead of per alert
+        confidences = np.fromiter(
+            (t.get('confidence', 0.0) for t in threat_results),
+            dtype=np.float64, count=len(threat_results)
+        )
+        severity_codes = self._classify_batch(confidences)
+        
         for i, threat_result in enumerate(threat_results):
             if threat_result.get('is_threat') or threat_result.get('exceeds_threshold'):
                 # Get corresponding event data
                 event_idx = threat_result.get('index', i)
                 if event_idx < len(events):
                     event_data = events[event_idx]
-                    alert = self.generate_alert(event_data, threat_result)
+                    severity = self._SEVERITY_LEVELS[severity_codes[i]]
+                    alert = self.generate_alert(event_data, threat_result, severity)
                     if alert:
                         alerts.append(alert)
         
+        # Don't leave the tail of the batch waiting for the flush window
+        try:
+            self._dist_q.put_nowait(_FLUSH)
+        except queue.Full:
+            pass
+        
         logger.info(f"Generated {len(alerts)} alerts from {len(events)} events")
         return alerts
     
@@ -112,64 +307,96 @@ class AlertManager:
         """Calculate alert severity based on threat information"""
         confidence = threat_info.get('confidence', 0.0)
         
-        if confidence >= Config.HIGH_SEVERITY_THRESHOLD:
-            return AlertSeverity.CRITICAL if confidence >= 0.95 else AlertSeverity.HIGH
-        elif confidence >= Config.MEDIUM_SEVERITY_THRESHOLD:
+        if confidence >= _HIGH_SEV:
+            return AlertSeverity.CRITICAL if confidence >= self.CRITICAL_CONFIDENCE else AlertSeverity.HIGH
+        elif confidence >= _MED_SEV:
             return AlertSeverity.MEDIUM
         else:
             return AlertSeverity.LOW
     
+    @classmethod
+    def _classify_batch(cls, confidences: np.ndarray) -> np.ndarray:
+        """
+        Classify severities for an array of confidences
+        
+        Args:
+            confidences: Threat confidence per result
+            
+        Returns:
+            int8 array of indexes into _SEVERITY_LEVELS
+        """
+        return np.select(
+            [
+                confidences >= max(_HIGH_SEV, cls.CRITICAL_CONFIDENCE),
+                confidences >= _HIGH_SEV,
+                confidences >= _MED_SEV,
+            ],
+            [3, 2, 1],
+            default=0
+        ).astype(np.int8)
+    
     def _generate_alert_id(self) -> str:
-        """Generate unique alert ID"""
-        import hashlib
-        timestamp = datetime.utcnow().isoformat()
-        unique_str = f"{timestamp}_{len(self.alert_history)}"
-        return hashlib.md5(unique_str.encode()).hexdigest()[:12]
+        """Generate unique alert ID (12 random hex characters)"""
+        return secrets.token_hex(6)
     
     def _generate_description(self, event_data: Dict, threat_info: Dict) -> str:
         """Generate human-readable alert description"""
         source = event_data.get('source', 'unknown')
-        confidence = threat_info.get('confidence', 0) * 100
+        confidence = threat_info.get('confidence', 0)
         
-        description = f"Potential security threat detected from {source} "
-        description += f"with {confidence:.1f}% confidence. "
+        parts = [
+            "Potential security threat detected from ", str(source),
+            f" with {confidence:.1%} confidence. "
+        ]
         
         # Add context from event data
         if 'activity' in event_data:
-            description += f"Activity: {event_data['activity']}. "
+            parts.append(f"Activity: {event_data['activity']}. ")
         
         if 'ip_address' in event_data:
-            description += f"Source IP: {event_data['ip_address']}. "
+            parts.append(f"Source IP: {event_data['ip_address']}. ")
         
-        return description
+        return "".join(parts)
     
     def _generate_recommendations(self, 
                                   severity: AlertSeverity,
-                                  threat_info: Dict) -> List[str]:
+                                  threat_info: Dict) -> Tuple[str, ...]:
         """Generate remediation recommendations"""
-        recommendations = []
-        
-        if severity in [AlertSeverity.HIGH, AlertSeverity.CRITICAL]:
-            recommendations.append("Immediately investigate this event")
-            recommendations.append("Review all recent activities from this source")
-            recommendations.append("Consider blocking the source IP address")
-            recommendations.append("Check for any successful unauthorized access")
+        if severity in (AlertSeverity.HIGH, AlertSeverity.CRITICAL):
+            return self._RECS_HIGH
         elif severity == AlertSeverity.MEDIUM:
-            recommendations.append("Review this event during next security review")
-            recommendations.append("Monitor the source for additional suspicious activity")
-            recommendations.append("Verify user identity if applicable")
+            return self._RECS_MEDIUM
         else:
-            recommendations.append("Log for future analysis")
-            recommendations.append("Monitor for pattern escalation")
-        
-        return recommendations
+            return self._RECS_LOW
     
     def _distribute_alert(self, alert: Dict):
+        """Queue alert for distribution by the background worker"""
+        try:
+            self._dist_q.put_nowait(alert)
+        except queue.Full:
+            logger.error(f"Alert distribution queue full, dropping notification for {alert['alert_id']}")
+    
+    def _dist_worker(self):
+        """Deliver queued alerts until shutdown"""
+        while True:
+            item = self._dist_q.get()
+            if item is _STOP:
+                break
+            if item is _FLUSH:
+                self.flush_slack()
+                continue
+            
+            try:
+                self._deliver_alert(item)
+            except Exception as e:
+                logger.error(f"Error distributing alert: {e}")
+    
+    def _deliver_alert(self, alert: Dict):
         """Distribute alert through configured channels"""
         severity = alert['severity']
         
         # Always log
-        logger.warning(f"ALERT [{severity.upper()}]: {alert['description']}")
+        logger.opt(lazy=True).warning("ALERT [{}]: {}", lambda: severity.upper(), lambda: alert['description'])
         
         # Send to Slack if configured and high severity
         if Config.SLACK_WEBHOOK_URL and severity in ['high', 'critical']:
@@ -180,59 +407,81 @@ class AlertManager:
             self._send_email_notification(alert)
     
     def _send_to_slack(self, alert: Dict):
-        """Send alert to Slack webhook"""
+        """Queue alert for the next batched Slack webhook message"""
         try:
             if not Config.SLACK_WEBHOOK_URL:
                 return
             
-            # Determine color based on severity
-            color_map = {
-                'low': '#36a64f',
-                'medium': '#ff9900',
-                'high': '#ff6600',
-                'critical': '#ff0000'
+            attachment = {
+                **self._SLACK_ATTACHMENT_TEMPLATE,
+                'color': _SLACK_COLORS.get(alert['severity'], '#808080'),
+                'title': f"🚨 Security Alert: {alert['severity'].upper()}",
+                'text': alert['description'],
+                'fields': self._build_slack_fields(alert),
+                'ts': int(alert['timestamp_epoch'])
             }
             
-            payload = {
-                'attachments': [{
-                    'color': color_map.get(alert['severity'], '#808080'),
-                    'title': f"🚨 Security Alert: {alert['severity'].upper()}",
-                    'text': alert['description'],
-                    'fields': [
-                        {
-                            'title': 'Alert ID',
-                            'value': alert['alert_id'],
-                            'short': True
-                        },
-                        {
-                            'title': 'Confidence',
-                            'value': f"{alert['confidence'] * 100:.1f}%",
-                            'short': True
-                        },
-                        {
-                            'title': 'Source',
-                            'value': alert['source'],
-                            'short': True
-                        },
-                        {
-                            'title': 'Timestamp',
-                            'value': alert['timestamp'],
-                            'short': True
-                        }
-                    ],
-                    'footer': 'Threat Detection System',
-                    'ts': int(datetime.utcnow().timestamp())
-                }]
-            }
+            with self._slack_lock:
+                self._slack_buffer.append(attachment)
+                buffered = len(self._slack_buffer)
+                
+                # Start the flush window on the first buffered attachment
+                if buffered < Config.SLACK_BATCH_SIZE and self._slack_timer is None:
+                    self._slack_timer = threading.Timer(Config.SLACK_BATCH_WINDOW, self.flush_slack)
+                    self._slack_timer.daemon = True
+                    self._slack_timer.start()
             
-            response = requests.post(
+            if buffered >= Config.SLACK_BATCH_SIZE:
+                self.flush_slack()
+                
+        except Exception as e:
+            logger.error(f"Error queueing Slack notification: {e}")
+    
+    @staticmethod
+    def _build_slack_fields(alert: Dict) -> List[Dict]:
+        """Build the Slack attachment fields for an alert"""
+        return [
+            {'title': 'Alert ID', 'value': alert['alert_id'], 'short': True},
+            {'title': 'Confidence', 'value': f"{alert['confidence'] * 100:.1f}%", 'short': True},
+            {'title': 'Source', 'value': alert['source'], 'short': True},
+            {'title': 'Timestamp', 'value': alert['timestamp'], 'short': True}
+        ]
+    
+    def flush_slack(self):
+        """Send all buffered Slack attachments as one webhook message"""
+        with self._slack_lock:
+            if self._slack_timer is not None:
+                self._slack_timer.cancel()
+                self._slack_timer = None
+            
+            attachments = self._slack_buffer
+            self._slack_buffer = []
+        
+        if attachments:
+            self._notifier.submit(self._post_to_slack, attachments)
+    
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        """Get the shared HTTP session, reusing TCP/TLS connections across posts"""
+        with cls._http_session_lock:
+            if cls._http_session is None:
+                session = requests.Session()
+                session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+                cls._http_session = session
+            return cls._http_session
+    
+    def _post_to_slack(self, attachments: List[Dict]):
+        """Post a batch of attachments to the Slack webhook"""
+        try:
+            response = self._get_session().post(
                 Config.SLACK_WEBHOOK_URL,
-                json=payload,
+                data=orjson.dumps({'attachments': attachments}),
+                headers={'Content-Type': 'application/json'},
                 timeout=5
             )
             
             if response.status_code == 200:
-                logger.info(f"Alert sent to Slack: {alert['alert_id']}")
+                logger.info(f"Sent {len(attachments)} alerts to Slack")
             else:
                 logger.error(f"Failed to send Slack alert: {response.status_code}")
                 
@@ -243,7 +492,15 @@ class AlertManager:
         """Send email notification (placeholder for actual implementation)"""
         # In production, integrate with AWS SES, SendGrid, or other email service
         logger.info(f"Email notification would be sent to {Config.ALERT_EMAIL}")
-        logger.info(f"Alert: {alert['alert_id']} - {alert['description']}")
+        logger.info("Alert: {} - {}", alert['alert_id'], alert['description'])
+    
+    def shutdown(self, wait: bool = True):
+        """Stop the notification workers, optionally waiting for pending deliveries"""
+        self._dist_q.put(_STOP)
+        if wait:
+            self._dist_thread.join()
+        self.flush_slack()
+        self._notifier.shutdown(wait=wait)
     
     def get_active_alerts(self, severity: str = None, limit: int = 100) -> List[Dict]:
         """
@@ -256,44 +513,85 @@ class AlertManager:
         Returns:
             List of active alerts
         """
-        alerts = [a for a in self.alert_history if a['status'] == 'open']
-        
-        if severity:
-            alerts = [a for a in alerts if a['severity'] == severity]
+        # Snapshot under the lock, the processing thread may add or evict
+        # alerts meanwhile
+        with self._store_lock:
+            open_ids = self._open_by_severity.get(severity, ()) if severity else self._open_ids
+            alerts = [self._by_id[alert_id] for alert_id in open_ids]
         
-        # Sort by timestamp, most recent first
-        alerts.sort(key=lambda x: x['timestamp'], reverse=True)
+        # Most recent first; only the top `limit` need ordering
+        recent = heapq.nlargest(limit, alerts, key=lambda x: x.timestamp)
         
-        return alerts[:limit]
+        # Hand out plain dict copies, not the stored records
+        return [alert.to_dict() for alert in recent]
     
-    def get_alert_statistics(self) -> Dict[str, Any]:
-        """Get alert statistics"""
+    def get_alert_statistics(self, recent_alerts: List[Dict] = None) -> Dict[str, Any]:
+        """
+        Get alert statistics
+        
+        Args:
+            recent_alerts: Active alerts, newest first, already fetched by the
+                caller; the first 10 are reported instead of fetching them again
+            
+        Returns:
+            Dictionary of alert totals, counts by severity and recent alerts
+        """
+        if recent_alerts is None:
+            recent_alerts = self.get_active_alerts(limit=10)
+        
+        with self._store_lock:
+            total_alerts = self._alerts_generated
+            active_alerts = len(self._open_ids)
+            by_severity = self.alert_count.copy()
+        
         return {
-            'total_alerts': len(self.alert_history),
-            'active_alerts': len([a for a in self.alert_history if a['status'] == 'open']),
-            'by_severity': self.alert_count.copy(),
-            'recent_alerts': self.get_active_alerts(limit=10)
+            'total_alerts': total_alerts,
+            'active_alerts': active_alerts,
+            'by_severity': by_severity,
+            'recent_alerts': recent_alerts[:10]
         }
     
+    def version(self) -> int:
+        """Get a counter that increases whenever alerts are added or closed"""
+        return self._version
+    
     def acknowledge_alert(self, alert_id: str) -> bool:
         """Mark alert as acknowledged"""
-        for alert in self.alert_history:
-            if alert['alert_id'] == alert_id:
-                alert['status'] = 'acknowledged'
-                alert['acknowledged_at'] = datetime.utcnow().isoformat()
-                logger.info(f"Alert acknowledged: {alert_id}")
-                return True
+        with self._store_lock:
+            alert = self._by_id.get(alert_id)
+            if alert is None:
+                return False
+            
+            alert.status = 'acknowledged'
+            alert.acknowledged_at = _utcnow().isoformat()
+            self._close(alert)
+            self._version += 1
         
-        return False
+        logger.info(f"Alert acknowledged: {alert_id}")
+        return True
     
     def resolve_alert(self, alert_id: str, resolution_notes: str = "") -> bool:
         """Mark alert as resolved"""
-        for alert in self.alert_history:
-            if alert['alert_id'] == alert_id:
-                alert['status'] = 'resolved'
-                alert['resolved_at'] = datetime.utcnow().isoformat()
-                alert['resolution_notes'] = resolution_notes
-                logger.info(f"Alert resolved: {alert_id}")
-                return True
+        with self._store_lock:
+            alert = self._by_id.get(alert_id)
+            if alert is None:
+                return False
+            
+            alert.status = 'resolved'
+            alert.resolved_at = _utcnow().isoformat()
+            alert.resolution_notes = resolution_notes
+            self._close(alert)
+            self._version += 1
         
-        return False
+        logger.info(f"Alert resolved: {alert_id}")
+        return True
+    
+    def _close(self, alert: Alert):
+        """Drop alert from the open-alert indexes (store lock held)"""
+        self._open_ids.discard(alert.alert_id)
+        self._open_by_severity[alert.severity].discard(alert.alert_id)
+    
+    def _forget(self, alert: Alert):
+        """Drop an evicted alert from all indexes (store lock held)"""
+        self._by_id.pop(alert.alert_id, None)
+        self._close(alert)
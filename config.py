@@ -7,6 +7,31 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _env_int(name: str, default: int, minimum: int = None) -> int:
+    """Read an integer setting, failing at import with the variable name"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+    if minimum is not None and number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}, got {number}")
+    return number
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting, failing at import with the variable name"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}") from None
+
+
 class Config:
     """Application configuration"""
     
@@ -22,23 +47,32 @@ class Config:
     AZURE_CLIENT_SECRET = os.getenv('AZURE_CLIENT_SECRET')
     AZURE_SUBSCRIPTION_ID = os.getenv('AZURE_SUBSCRIPTION_ID')
     AZURE_WORKSPACE_ID = os.getenv('AZURE_WORKSPACE_ID')
+    # Drop successful, informational events in the query itself
+    AZURE_SKIP_BENIGN = os.getenv('AZURE_SKIP_BENIGN', 'False').lower() == 'true'
+    # Longest delay (seconds) between an event's TimeGenerated and its
+    # ingestion; bounds the time range incremental polls scan server-side
+    AZURE_INGESTION_LAG = _env_int('AZURE_INGESTION_LAG', 300)
     
     # Application Settings
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
-    FLASK_PORT = int(os.getenv('FLASK_PORT', 5000))
+    FLASK_PORT = _env_int('FLASK_PORT', 5000)
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
     
     # ML Model Settings
     MODEL_PATH = os.getenv('MODEL_PATH', './models/threat_detector.pkl')
-    CONFIDENCE_THRESHOLD = float(os.getenv('CONFIDENCE_THRESHOLD', 0.7))
-    RETRAIN_INTERVAL = int(os.getenv('RETRAIN_INTERVAL', 86400))
+    CONFIDENCE_THRESHOLD = _env_float('CONFIDENCE_THRESHOLD', 0.7)
+    RETRAIN_INTERVAL = _env_int('RETRAIN_INTERVAL', 86400)
     
     # Alert Settings
     ALERT_EMAIL = os.getenv('ALERT_EMAIL', 'security-team@example.com')
     SLACK_WEBHOOK_URL = os.getenv('SLACK_WEBHOOK_URL')
-    HIGH_SEVERITY_THRESHOLD = float(os.getenv('HIGH_SEVERITY_THRESHOLD', 0.85))
-    MEDIUM_SEVERITY_THRESHOLD = float(os.getenv('MEDIUM_SEVERITY_THRESHOLD', 0.65))
+    HIGH_SEVERITY_THRESHOLD = _env_float('HIGH_SEVERITY_THRESHOLD', 0.85)
+    MEDIUM_SEVERITY_THRESHOLD = _env_float('MEDIUM_SEVERITY_THRESHOLD', 0.65)
+    SLACK_BATCH_SIZE = _env_int('SLACK_BATCH_SIZE', 20)  # Slack allows up to 100 attachments
+    SLACK_BATCH_WINDOW = _env_float('SLACK_BATCH_WINDOW', 1.0)  # Seconds
+    ALERT_HISTORY_MAX = _env_int('ALERT_HISTORY_MAX', 10000, minimum=1)
+    ALERT_QUEUE_SIZE = _env_int('ALERT_QUEUE_SIZE', 1000)
     
     # Dashboard Settings
-    REFRESH_INTERVAL = int(os.getenv('REFRESH_INTERVAL', 5000))
-    MAX_EVENTS_DISPLAY = int(os.getenv('MAX_EVENTS_DISPLAY', 100))
+    REFRESH_INTERVAL = _env_int('REFRESH_INTERVAL', 5000)
+    MAX_EVENTS_DISPLAY = _env_int('MAX_EVENTS_DISPLAY', 100)
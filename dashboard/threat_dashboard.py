@@ -2,14 +2,85 @@
 Real-time threat detection dashboard using Dash and Plotly.
 """
 import dash
-from dash import dcc, html, Input, Output
+from dash import dcc, html, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
-import plotly.graph_objs as go
-import plotly.express as px
+import plotly.io as pio
+from collections import Counter
 from datetime import datetime, timedelta
-import pandas as pd
-from typing import List, Dict
+from html import escape
+from statistics import fmean
+from typing import TYPE_CHECKING, List, Dict
 from loguru import logger
+from config import Config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Figures are returned as plain dicts, which skips plotly's graph-object
+# validation. plotly.js can't resolve template names, so expand the dark
+# template once here.
+_DARK_TEMPLATE = pio.templates['plotly_dark'].to_plotly_json()
+
+# Chart color and table badge style per severity
+_SEVERITY_COLORS = {
+    'low': '#28a745',
+    'medium': '#17a2b8',
+    'high': '#ffc107',
+    'critical': '#dc3545'
+}
+_SEVERITY_BADGES = {
+    'low': 'success',
+    'medium': 'info',
+    'high': 'warning',
+    'critical': 'danger'
+}
+
+# Longer timeline series are downsampled before being sent to the browser
+_TIMELINE_MAX_POINTS = 500
+
+
+def _lttb_indices(x, y, n_out: int):
+    """
+    Pick points to keep with Largest-Triangle-Three-Buckets downsampling
+    
+    Args:
+        x: Monotonic x values (numpy array)
+        y: y values (numpy array)
+        n_out: Number of points to keep
+        
+    Returns:
+        Sorted indices of the kept points, always including the endpoints
+    """
+    import numpy as np
+    
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    # The inner points are split into n_out - 2 buckets; from each, keep the
+    # point forming the largest triangle with the previously kept point and
+    # the average of the next bucket
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[hi:edges[i + 2]].mean()
+            next_y = y[hi:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        
+        area = np.abs(
+            (x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a])
+        )
+        a = lo + int(area.argmax())
+        indices[i + 1] = a
+    
+    return indices
 
 
 class ThreatDashboard:
@@ -26,11 +97,22 @@ class ThreatDashboard:
         self.alert_manager = alert_manager
         self.preprocessor = preprocessor
         
-        # Initialize Dash app
+        # (alert store version, (timeline, source, confidence, alerts table));
+        # the alert-derived outputs are only rebuilt when the store changes,
+        # so several open browsers share one build
+        self._figure_cache = None
+        
+        # Dash serializes callback responses through plotly's JSON encoder;
+        # orjson is several times faster than the stdlib engine for figures
+        pio.json.config.default_engine = 'orjson'
+        
+        # Initialize Dash app (update_title=None skips the "Updating..."
+        # document title rewrite on every interval refresh)
         self.app = dash.Dash(
             __name__,
             external_stylesheets=[dbc.themes.DARKLY],
-            suppress_callback_exceptions=True
+            suppress_callback_exceptions=True,
+            update_title=None
         )
         
         # Setup layout
@@ -147,9 +229,15 @@ class ThreatDashboard:
             # Auto-refresh interval
             dcc.Interval(
                 id='interval-component',
-                interval=5000,  # Update every 5 seconds
+                interval=Config.REFRESH_INTERVAL,  # Milliseconds, backed off while idle
                 n_intervals=0
-            )
+            ),
+            
+            # What this browser last rendered, so unchanged ticks send nothing
+            dcc.Store(id='dashboard-signature'),
+            
+            # Alert counts, rendered into the status cards in the browser
+            dcc.Store(id='stats-store')
         ], fluid=True)
     
     def _create_status_card(self, title: str, id: str, color: str):
@@ -164,13 +252,48 @@ class ThreatDashboard:
     def _setup_callbacks(self):
         """Setup dashboard callbacks"""
         
-        @self.app.callback(
+        # The status cards only format numbers the server already sent, so
+        # they are filled in the browser from stats-store
+        self.app.clientside_callback(
+            """
+            function(s) {
+                s = s || {};
+                return [s.total, s.critical, s.high, s.medium, s.low].map(
+                    function(v) { return String(v || 0); }
+                );
+            }
+            """,
             [
                 Output("total-alerts", "children"),
                 Output("critical-count", "children"),
                 Output("high-count", "children"),
                 Output("medium-count", "children"),
                 Output("low-count", "children"),
+            ],
+            [Input("stats-store", "data")]
+        )
+        
+        # Poll less often while nothing changes: 3x the refresh interval
+        # after a minute without new data, 6x after five minutes, and back
+        # to the base rate as soon as the rendered signature changes
+        base = Config.REFRESH_INTERVAL
+        self.app.clientside_callback(
+            f"""
+            function(n, modified, current) {{
+                var idle = modified > 0 ? Date.now() - modified : 0;
+                var next = idle > 300000 ? {base * 6} : idle > 60000 ? {base * 3} : {base};
+                return next === current ? window.dash_clientside.no_update : next;
+            }}
+            """,
+            Output("interval-component", "interval"),
+            [Input("interval-component", "n_intervals"),
+             Input("dashboard-signature", "modified_timestamp")],
+            [State("interval-component", "interval")]
+        )
+        
+        @self.app.callback(
+            [
+                Output("stats-store", "data"),
                 Output("threats-timeline", "figure"),
                 Output("threat-distribution", "figure"),
                 Output("threats-by-source", "figure"),
@@ -178,90 +301,159 @@ class ThreatDashboard:
                 Output("recent-alerts-table", "children"),
                 Output("system-health", "children"),
                 Output("processing-stats", "children"),
+                Output("dashboard-signature", "data"),
             ],
-            [Input("interval-component", "n_intervals")]
+            [Input("interval-component", "n_intervals")],
+            [State("dashboard-signature", "data")]
         )
-        def update_dashboard(n):
+        def update_dashboard(n, last_signature):
             """Update all dashboard components"""
             try:
-                # Get alert statistics
-                stats = self.alert_manager.get_alert_statistics()
+                # Read the version first: a change racing the fetch below
+                # only costs a rebuild on the next tick
+                version = self.alert_manager.version()
+                alerts = self.alert_manager.get_active_alerts(limit=1000)
+                stats = self.alert_manager.get_alert_statistics(recent_alerts=alerts)
                 
-                # Update counts
                 total = stats.get('total_alerts', 0)
                 by_severity = stats.get('by_severity', {})
                 
-                critical = by_severity.get('critical', 0)
-                high = by_severity.get('high', 0)
-                medium = by_severity.get('medium', 0)
-                low = by_severity.get('low', 0)
-                
-                # Create timeline chart
-                timeline_fig = self._create_timeline_chart()
-                
-                # Create distribution pie chart
-                distribution_fig = self._create_distribution_chart(by_severity)
+                # New, acknowledged or resolved alerts all change this; when
+                # it matches what the browser has, only refresh the health
+                # panel's timestamp and leave every other output untouched
+                signature = {
+                    'alerts': [total, stats.get('active_alerts', 0),
+                               alerts[0]['alert_id'] if alerts else None],
+                    'by_severity': by_severity
+                }
+                if last_signature == signature:
+                    return (no_update,) * 6 + (
+                        self._create_health_display(stats), no_update, no_update
+                    )
+                severity_changed = (last_signature or {}).get('by_severity') != by_severity
                 
-                # Create source bar chart
-                source_fig = self._create_source_chart()
+                confidences = [a['confidence'] for a in alerts]
                 
-                # Create confidence histogram
-                confidence_fig = self._create_confidence_histogram()
+                cached = self._figure_cache
+                if cached is not None and cached[0] == version:
+                    timeline_fig, source_fig, confidence_fig, alerts_table = cached[1]
+                else:
+                    # Share one fetch across the charts; only the timeline's
+                    # time bucketing needs a DataFrame
+                    timeline_fig = self._create_timeline_chart(self._alerts_frame(alerts))
+                    source_fig = self._create_source_chart(alerts)
+                    confidence_fig = self._create_confidence_histogram(confidences)
+                    
+                    # Recent alerts table (alerts are newest first)
+                    alerts_table = self._create_alerts_table(alerts[:10])
+                    
+                    self._figure_cache = (
+                        version, (timeline_fig, source_fig, confidence_fig, alerts_table)
+                    )
                 
-                # Create recent alerts table
-                alerts_table = self._create_alerts_table()
+                # Create distribution pie chart
+                distribution_fig = (
+                    self._create_distribution_chart(by_severity) if severity_changed else no_update
+                )
                 
                 # Create system health display
-                health_display = self._create_health_display()
+                health_display = self._create_health_display(stats)
                 
                 # Create processing stats
-                stats_display = self._create_stats_display()
+                stats_display = self._create_stats_display(stats, confidences)
+                
+                if severity_changed:
+                    counts = {
+                        'total': total,
+                        'critical': by_severity.get('critical', 0),
+                        'high': by_severity.get('high', 0),
+                        'medium': by_severity.get('medium', 0),
+                        'low': by_severity.get('low', 0)
+                    }
+                else:
+                    counts = no_update
                 
                 return (
-                    str(total), str(critical), str(high), str(medium), str(low),
-                    timeline_fig, distribution_fig, source_fig, confidence_fig,
-                    alerts_table, health_display, stats_display
+                    counts, timeline_fig, distribution_fig, source_fig, confidence_fig,
+                    alerts_table, health_display, stats_display, signature
                 )
                 
             except Exception as e:
                 logger.error(f"Error updating dashboard: {e}")
-                return "0", "0", "0", "0", "0", {}, {}, {}, {}, html.Div(), html.Div(), html.Div()
+                return None, {}, {}, {}, {}, html.Div(), html.Div(), html.Div(), None
+    
+    def _alerts_frame(self, alerts: List[Dict]):
+        """
+        Build the timestamp/severity DataFrame used by the timeline
+        
+        Args:
+            alerts: Alerts from the alert manager
+            
+        Returns:
+            DataFrame of alert times and severities, or None if there are no alerts
+        """
+        if not alerts:
+            return None
+        
+        # pandas is only needed here and in the timeline, so it is imported
+        # on first use rather than when the dashboard module loads
+        import pandas as pd
+        
+        # Alerts carry their UTC epoch time, so convert that in one vectorized
+        # call rather than parsing every ISO string
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime([a['timestamp_epoch'] for a in alerts], unit='s'),
+            'severity': [a['severity'] for a in alerts]
+        })
     
-    def _create_timeline_chart(self):
+    def _create_timeline_chart(self, df: 'pd.DataFrame'):
         """Create threats over time chart"""
         try:
-            alerts = self.alert_manager.get_active_alerts(limit=1000)
-            
-            if not alerts:
+            if df is None:
                 return self._empty_figure("No data available")
             
-            # Convert to DataFrame
-            df = pd.DataFrame(alerts)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            df = df.sort_values('timestamp')
-            
-            # Group by hour and severity
-            df['hour'] = df['timestamp'].dt.floor('H')
-            grouped = df.groupby(['hour', 'severity']).size().reset_index(name='count')
-            
-            fig = px.line(
-                grouped, x='hour', y='count', color='severity',
-                color_discrete_map={
-                    'low': '#28a745',
-                    'medium': '#17a2b8',
-                    'high': '#ffc107',
-                    'critical': '#dc3545'
-                }
-            )
+            import pandas as pd
             
-            fig.update_layout(
-                template='plotly_dark',
-                xaxis_title='Time',
-                yaxis_title='Number of Threats',
-                hovermode='x unified'
+            # Hourly counts, one column per severity (0 where a severity is absent)
+            counts = (
+                df.set_index('timestamp')
+                .groupby([pd.Grouper(freq='H'), 'severity'])
+                .size()
+                .unstack(fill_value=0)
             )
             
-            return fig
+            hours = counts.index.strftime('%Y-%m-%d %H:%M')
+            
+            traces = []
+            for severity in counts.columns:
+                x, y = hours, counts[severity].to_numpy()
+                
+                # Keep long series to a fixed number of visually significant points
+                if len(counts) > _TIMELINE_MAX_POINTS:
+                    keep = _lttb_indices(
+                        counts.index.asi8 / 3.6e12, y.astype(float), _TIMELINE_MAX_POINTS
+                    )
+                    x, y = x[keep], y[keep]
+                
+                traces.append({
+                    'type': 'scatter',
+                    'mode': 'lines',
+                    'name': severity,
+                    'x': x.tolist(),
+                    'y': y.tolist(),
+                    'line': {'color': _SEVERITY_COLORS.get(severity, '#808080')}
+                })
+            
+            return {
+                'data': traces,
+                'layout': {
+                    'template': _DARK_TEMPLATE,
+                    'xaxis': {'title': {'text': 'Time'}},
+                    'yaxis': {'title': {'text': 'Number of Threats'}},
+                    'legend': {'title': {'text': 'severity'}},
+                    'hovermode': 'x unified'
+                }
+            }
             
         except Exception as e:
             logger.error(f"Error creating timeline chart: {e}")
@@ -276,137 +468,114 @@ class ThreatDashboard:
             labels = list(by_severity.keys())
             values = list(by_severity.values())
             
-            colors = {
-                'low': '#28a745',
-                'medium': '#17a2b8',
-                'high': '#ffc107',
-                'critical': '#dc3545'
+            return {
+                'data': [{
+                    'type': 'pie',
+                    'labels': labels,
+                    'values': values,
+                    'marker': {'colors': [_SEVERITY_COLORS.get(l, '#808080') for l in labels]},
+                    'hole': 0.3
+                }],
+                'layout': {'template': _DARK_TEMPLATE}
             }
             
-            fig = go.Figure(data=[go.Pie(
-                labels=labels,
-                values=values,
-                marker=dict(colors=[colors.get(l, '#808080') for l in labels]),
-                hole=.3
-            )])
-            
-            fig.update_layout(template='plotly_dark')
-            
-            return fig
-            
         except Exception as e:
             logger.error(f"Error creating distribution chart: {e}")
             return self._empty_figure("Error loading data")
     
-    def _create_source_chart(self):
+    def _create_source_chart(self, alerts: List[Dict]):
         """Create threats by source bar chart"""
         try:
-            alerts = self.alert_manager.get_active_alerts(limit=1000)
-            
             if not alerts:
                 return self._empty_figure("No data available")
             
-            df = pd.DataFrame(alerts)
-            source_counts = df['source'].value_counts().head(10)
-            
-            fig = go.Figure(data=[
-                go.Bar(x=source_counts.index, y=source_counts.values,
-                      marker_color='#17a2b8')
-            ])
-            
-            fig.update_layout(
-                template='plotly_dark',
-                xaxis_title='Source',
-                yaxis_title='Number of Threats'
-            )
-            
-            return fig
+            source_counts = Counter(a['source'] for a in alerts).most_common(10)
+            
+            return {
+                'data': [{
+                    'type': 'bar',
+                    'x': [source for source, _ in source_counts],
+                    'y': [n for _, n in source_counts],
+                    'marker': {'color': '#17a2b8'}
+                }],
+                'layout': {
+                    'template': _DARK_TEMPLATE,
+                    'xaxis': {'title': {'text': 'Source'}},
+                    'yaxis': {'title': {'text': 'Number of Threats'}}
+                }
+            }
             
         except Exception as e:
             logger.error(f"Error creating source chart: {e}")
             return self._empty_figure("Error loading data")
     
-    def _create_confidence_histogram(self):
+    def _create_confidence_histogram(self, confidences: List[float]):
         """Create confidence distribution histogram"""
         try:
-            alerts = self.alert_manager.get_active_alerts(limit=1000)
-            
-            if not alerts:
+            if not confidences:
                 return self._empty_figure("No data available")
             
-            df = pd.DataFrame(alerts)
-            
-            fig = go.Figure(data=[
-                go.Histogram(x=df['confidence'], nbinsx=20,
-                           marker_color='#ffc107')
-            ])
-            
-            fig.update_layout(
-                template='plotly_dark',
-                xaxis_title='Confidence Score',
-                yaxis_title='Frequency'
-            )
-            
-            return fig
+            return {
+                'data': [{
+                    'type': 'histogram',
+                    'x': confidences,
+                    'nbinsx': 20,
+                    'marker': {'color': '#ffc107'}
+                }],
+                'layout': {
+                    'template': _DARK_TEMPLATE,
+                    'xaxis': {'title': {'text': 'Confidence Score'}},
+                    'yaxis': {'title': {'text': 'Frequency'}}
+                }
+            }
             
         except Exception as e:
             logger.error(f"Error creating confidence histogram: {e}")
             return self._empty_figure("Error loading data")
     
-    def _create_alerts_table(self):
+    def _create_alerts_table(self, alerts: List[Dict]):
         """Create recent alerts table"""
         try:
-            alerts = self.alert_manager.get_active_alerts(limit=10)
-            
             if not alerts:
                 return html.P("No recent alerts", className="text-muted")
             
-            table_header = [
-                html.Thead(html.Tr([
-                    html.Th("Time"),
-                    html.Th("Severity"),
-                    html.Th("Source"),
-                    html.Th("Confidence"),
-                    html.Th("Description")
-                ]))
-            ]
-            
+            # Render the rows as one HTML string instead of a component per
+            # cell, which keeps the per-tick callback payload small. Alert
+            # text comes from log data, so every value is escaped.
             rows = []
             for alert in alerts:
-                severity_badge = {
-                    'low': 'success',
-                    'medium': 'info',
-                    'high': 'warning',
-                    'critical': 'danger'
-                }
-                
-                timestamp = datetime.fromisoformat(alert['timestamp']).strftime('%H:%M:%S')
+                timestamp = datetime.utcfromtimestamp(alert['timestamp_epoch']).strftime('%H:%M:%S')
+                severity = alert['severity']
+                description = alert['description']
+                if len(description) > 100:
+                    description = description[:100] + "..."
                 
-                row = html.Tr([
-                    html.Td(timestamp),
-                    html.Td(dbc.Badge(alert['severity'].upper(), 
-                                     color=severity_badge.get(alert['severity'], 'secondary'))),
-                    html.Td(alert['source']),
-                    html.Td(f"{alert['confidence']*100:.1f}%"),
-                    html.Td(alert['description'][:100] + "..." if len(alert['description']) > 100 
-                           else alert['description'])
-                ])
-                rows.append(row)
+                rows.append(
+                    f"<tr><td>{timestamp}</td>"
+                    f"<td><span class=\"badge bg-{_SEVERITY_BADGES.get(severity, 'secondary')}\">"
+                    f"{escape(severity.upper())}</span></td>"
+                    f"<td>{escape(str(alert['source']))}</td>"
+                    f"<td>{alert['confidence'] * 100:.1f}%</td>"
+                    f"<td>{escape(description)}</td></tr>"
+                )
             
-            table_body = [html.Tbody(rows)]
+            table = (
+                '<div class="table-responsive">'
+                '<table class="table table-bordered table-dark table-hover table-striped">'
+                '<thead><tr><th>Time</th><th>Severity</th><th>Source</th>'
+                '<th>Confidence</th><th>Description</th></tr></thead>'
+                f'<tbody>{"".join(rows)}</tbody></table></div>'
+            )
             
-            return dbc.Table(table_header + table_body, 
-                           bordered=True, dark=True, hover=True, 
-                           responsive=True, striped=True)
+            return dcc.Markdown(table, dangerously_allow_html=True)
             
         except Exception as e:
             logger.error(f"Error creating alerts table: {e}")
             return html.P("Error loading alerts", className="text-danger")
     
-    def _create_health_display(self):
+    def _create_health_display(self, stats: Dict):
         """Create system health display"""
         try:
-            stats = self.alert_manager.get_alert_statistics()
             active = stats.get('active_alerts', 0)
             
             status = "🟢 Operational" if active < 10 else "🟡 Elevated" if active < 50 else "🔴 Critical"
@@ -421,25 +590,22 @@ class ThreatDashboard:
             logger.error(f"Error creating health display: {e}")
             return html.P("Error loading health status", className="text-danger")
     
-    def _create_stats_display(self):
+    def _create_stats_display(self, stats: Dict, confidences: List[float]):
         """Create processing statistics display"""
         try:
-            stats = self.alert_manager.get_alert_statistics()
-            
             return html.Div([
                 html.P(f"Total Events Processed: {stats.get('total_alerts', 0)}"),
-                html.P(f"Detection Rate: {self._calculate_detection_rate():.2f}%"),
-                html.P(f"Average Confidence: {self._calculate_avg_confidence():.2f}")
+                html.P(f"Detection Rate: {self._calculate_detection_rate(stats):.2f}%"),
+                html.P(f"Average Confidence: {self._calculate_avg_confidence(confidences):.2f}")
             ])
             
         except Exception as e:
             logger.error(f"Error creating stats display: {e}")
             return html.P("Error loading statistics", className="text-danger")
     
-    def _calculate_detection_rate(self):
+    def _calculate_detection_rate(self, stats: Dict):
         """Calculate threat detection rate"""
         try:
-            stats = self.alert_manager.get_alert_statistics()
             total = stats.get('total_alerts', 0)
             if total == 0:
                 return 0.0
@@ -449,34 +615,33 @@ class ThreatDashboard:
         except:
             return 0.0
     
-    def _calculate_avg_confidence(self):
+    def _calculate_avg_confidence(self, confidences: List[float]):
         """Calculate average confidence score"""
         try:
-            alerts = self.alert_manager.get_active_alerts(limit=1000)
-            if not alerts:
+            if not confidences:
                 return 0.0
             
-            confidences = [a['confidence'] for a in alerts]
-            return sum(confidences) / len(confidences)
+            return fmean(confidences)
         except:
             return 0.0
     
     def _empty_figure(self, message: str):
         """Create empty figure with message"""
-        fig = go.Figure()
-        fig.update_layout(
-            template='plotly_dark',
-            xaxis=dict(showgrid=False, showticklabels=False, zeroline=False),
-            yaxis=dict(showgrid=False, showticklabels=False, zeroline=False),
-            annotations=[{
-                'text': message,
-                'xref': 'paper',
-                'yref': 'paper',
-                'showarrow': False,
-                'font': {'size': 14}
-            }]
-        )
-        return fig
+        return {
+            'data': [],
+            'layout': {
+                'template': _DARK_TEMPLATE,
+                'xaxis': {'showgrid': False, 'showticklabels': False, 'zeroline': False},
+                'yaxis': {'showgrid': False, 'showticklabels': False, 'zeroline': False},
+                'annotations': [{
+                    'text': message,
+                    'xref': 'paper',
+                    'yref': 'paper',
+                    'showarrow': False,
+                    'font': {'size': 14}
+                }]
+            }
+        }
     
     def run(self, host: str = '0.0.0.0', port: int = 8050, debug: bool = False):
         """Run the dashboard server"""
@@ -1,8 +1,20 @@
 """
 Data collection package initialization.
-"""
-from data_collection.aws_collector import AWSLogCollector
-from data_collection.azure_collector import AzureLogCollector
-from data_collection.unified_collector import UnifiedCollector
 
+Collectors are imported on first access so that importing the package
+doesn't load every cloud SDK.
+"""
 __all__ = ['AWSLogCollector', 'AzureLogCollector', 'UnifiedCollector']
+
+
+def __getattr__(name):
+    if name == 'AWSLogCollector':
+        from data_collection.aws_collector import AWSLogCollector
+        return AWSLogCollector
+    if name == 'AzureLogCollector':
+        from data_collection.azure_collector import AzureLogCollector
+        return AzureLogCollector
+    if name == 'UnifiedCollector':
+        from data_collection.unified_collector import UnifiedCollector
+        return UnifiedCollector
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,13 +1,38 @@
 """
 AWS CloudWatch log collector for real-time security event ingestion.
 """
-import boto3
-import json
+import orjson
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Generator
+from typing import List, Dict, Generator, Callable, Tuple
 from loguru import logger
 from config import Config
 
+# Time slices of a stream_logs window fetched concurrently, and the shortest
+# slice worth its own request chain (milliseconds)
+_FETCH_SLICES = 8
+_MIN_SLICE_MS = 1000
+
+
+@lru_cache(maxsize=4096)
+def _iso_second(seconds: int) -> str:
+    """ISO string of a local-time epoch second (cached; events arrive in bursts)"""
+    return datetime.fromtimestamp(seconds).isoformat()
+
+
+def _format_timestamp(timestamp_ms: int) -> str:
+    """
+    Format a CloudWatch epoch-millisecond timestamp as ISO local time
+    
+    Same output as datetime.fromtimestamp(timestamp_ms / 1000).isoformat(),
+    but the date/time conversion is done once per second, not per event.
+    """
+    seconds, millis = divmod(timestamp_ms, 1000)
+    if millis:
+        return f"{_iso_second(seconds)}.{millis:03d}000"
+    return _iso_second(seconds)
+
 
 class AWSLogCollector:
     """Collects security logs from AWS CloudWatch in real-time"""
@@ -15,6 +40,9 @@ class AWSLogCollector:
     def __init__(self):
         """Initialize AWS CloudWatch client"""
         try:
+            # Imported here so deployments without AWS don't pay for boto3
+            import boto3
+            
             self.client = boto3.client(
                 'logs',
                 aws_access_key_id=Config.AWS_ACCESS_KEY_ID,
@@ -63,21 +91,119 @@ class AWSLogCollector:
         end_timestamp = int(end_time.timestamp() * 1000)
         
         try:
-            # Filter log events
-            kwargs = {
-                'logGroupName': self.log_group_name,
-                'startTime': start_timestamp,
-                'endTime': end_timestamp,
-                'limit': 100
-            }
+            # filter_log_events covers every stream in the group, but its pages
+            # are chained by nextToken. The window is split into time slices
+            # instead, each paged on its own thread (boto3 clients are
+            # thread-safe), so the wall time is the slowest slice rather than
+            # the sum of all pages
+            slices = self._split_window(start_timestamp, end_timestamp)
+            with ThreadPoolExecutor(max_workers=len(slices)) as executor:
+                futures = [
+                    executor.submit(self._fetch_window, slice_start, slice_end)
+                    for slice_start, slice_end in slices
+                ]
+                # Slice by slice, so events are still yielded oldest first
+                for future in futures:
+                    for event in future.result():
+                        log_entry = self._parse_log_event(event)
+                        if log_entry:
+                            yield log_entry
+                
+        except Exception as e:
+            logger.error(f"Error streaming logs from AWS: {e}")
+    
+    def supports_live_tail(self) -> bool:
+        """Whether the installed botocore exposes the StartLiveTail API"""
+        return hasattr(self.client, 'start_live_tail')
+    
+    def tail_logs(self, should_stop: Callable[[], bool] = None) -> Generator[Dict, None, None]:
+        """
+        Stream new log events as CloudWatch pushes them (StartLiveTail)
+        
+        Unlike polling stream_logs, every event is delivered once and no
+        window is re-scanned. A session ends after at most three hours, after
+        which the generator returns and the caller should start a new one.
+        
+        Args:
+            should_stop: Checked on every session update; ends the tail when true
             
-            while True:
-                response = self.client.filter_log_events(**kwargs)
+        Yields:
+            Dictionary containing log event data
+        """
+        response = self.client.start_live_tail(
+            logGroupIdentifiers=[self._get_log_group_arn()]
+        )
+        stream = response['responseStream']
+        
+        try:
+            for message in stream:
+                if should_stop is not None and should_stop():
+                    break
                 
-                for event in response.get('events', []):
+                # sessionStart carries no events; sessionUpdate arrives about
+                # once a second, with an empty result list when idle
+                update = message.get('sessionUpdate')
+                if not update:
+                    continue
+                
+                for event in update.get('sessionResults', []):
                     log_entry = self._parse_log_event(event)
                     if log_entry:
                         yield log_entry
+        finally:
+            stream.close()
+    
+    def _get_log_group_arn(self) -> str:
+        """Resolve the configured log group name to the ARN live tail expects"""
+        response = self.client.describe_log_groups(logGroupNamePrefix=self.log_group_name)
+        for group in response.get('logGroups', []):
+            if group['logGroupName'] == self.log_group_name:
+                # Live tail rejects the wildcard form ('...:log-group:name:*')
+                arn = group.get('logGroupArn') or group['arn']
+                return arn[:-2] if arn.endswith(':*') else arn
+        
+        raise ValueError(f"Log group not found: {self.log_group_name}")
+    
+    @staticmethod
+    def _split_window(start_timestamp: int, end_timestamp: int) -> List[Tuple[int, int]]:
+        """
+        Split a time window into consecutive, non-overlapping slices
+        
+        Args:
+            start_timestamp: Window start in epoch milliseconds
+            end_timestamp: Window end in epoch milliseconds (inclusive)
+            
+        Returns:
+            (start, end) pairs in epoch milliseconds, both inclusive
+        """
+        span = end_timestamp - start_timestamp + 1
+        count = max(1, min(_FETCH_SLICES, span // _MIN_SLICE_MS))
+        bounds = [start_timestamp + span * i // count for i in range(count + 1)]
+        return [(bounds[i], bounds[i + 1] - 1) for i in range(count)]
+    
+    def _fetch_window(self, start_timestamp: int, end_timestamp: int) -> List[Dict]:
+        """
+        Fetch all events of the log group within a time window
+        
+        Args:
+            start_timestamp: Window start in epoch milliseconds
+            end_timestamp: Window end in epoch milliseconds
+            
+        Returns:
+            Raw log events
+        """
+        events = []
+        kwargs = {
+            'logGroupName': self.log_group_name,
+            'startTime': start_timestamp,
+            'endTime': end_timestamp,
+            'limit': 10000
+        }
+        
+        try:
+            while True:
+                response = self.client.filter_log_events(**kwargs)
+                events.extend(response.get('events', []))
                 
                 # Check if there are more events to retrieve
                 next_token = response.get('nextToken')
@@ -87,7 +213,9 @@ class AWSLogCollector:
                 kwargs['nextToken'] = next_token
                 
         except Exception as e:
-            logger.error(f"Error streaming logs from AWS: {e}")
+            logger.error(f"Error fetching AWS log events: {e}")
+        
+        return events
     
     def _parse_log_event(self, event: Dict) -> Dict:
         """
@@ -102,19 +230,22 @@ class AWSLogCollector:
         try:
             message = event.get('message', '')
             
-            # Try to parse JSON messages
-            try:
-                parsed_message = json.loads(message)
-            except json.JSONDecodeError:
+            # Only attempt JSON for messages that can be JSON objects/arrays;
+            # plain-text lines (the common case) skip the failed parse
+            if message[:1] in ('{', '[') or message.lstrip()[:1] in ('{', '['):
+                try:
+                    parsed_message = orjson.loads(message)
+                except orjson.JSONDecodeError:
+                    parsed_message = {'raw_message': message}
+            else:
                 parsed_message = {'raw_message': message}
             
             return {
-                'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
+                'timestamp': _format_timestamp(event['timestamp']),
                 'log_stream': event.get('logStreamName', 'unknown'),
                 'message': parsed_message,
                 'source': 'aws',
-                'event_id': event.get('eventId'),
-                'raw_data': event
+                'event_id': event.get('eventId')
             }
         except Exception as e:
             logger.warning(f"Failed to parse log event: {e}")
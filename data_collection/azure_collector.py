@@ -3,15 +3,69 @@ Azure Monitor log collector for real-time security event ingestion.
 """
 from azure.identity import ClientSecretCredential
 from azure.monitor.query import LogsQueryClient, LogsQueryStatus
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Generator
 from loguru import logger
 from config import Config
 
 
+def _as_utc(value: datetime) -> datetime:
+    """Mark a naive UTC datetime as UTC for the query timespan"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _column_index(columns: List[str]) -> Dict[str, int]:
+    """Map each column name of a result table to its position in a row"""
+    return {name: i for i, name in enumerate(columns)}
+
+
+def _field(values: List, columns: Dict[str, int], name: str, default=None):
+    """Value of a named column in a row, or default if the table lacks it"""
+    i = columns.get(name)
+    return values[i] if i is not None and i < len(values) else default
+
+
 class AzureLogCollector:
     """Collects security logs from Azure Monitor in real-time"""
     
+    # The time window is never part of the KQL: it is passed as the query
+    # timespan, so the text is built once rather than formatted per call
+    _SECURITY_EVENT_QUERY = """
+            SecurityEvent
+            | union SigninLogs
+            | union AuditLogs
+            | union AzureActivity
+            {benign_filter}
+            {ingestion_filter}
+            | project TimeGenerated, EventID, Activity, OperationName, 
+                      ResultType, ResultDescription, IPAddress, 
+                      Identity, Category, Level, ResourceId{ingestion_column}
+            | order by TimeGenerated desc
+            """
+    
+    # Used by get_new_events: keeps rows ingested after the watermark (filled
+    # in per poll) and returns their ingestion time as the last column
+    _INGESTION_FILTER = """| extend IngestedAt = ingestion_time()
+            | where IngestedAt > datetime({watermark})"""
+    _INGESTION_COLUMN = 'IngestedAt'
+    
+    _SECURITY_ALERT_QUERY = """
+            SecurityAlert
+            | project TimeGenerated, AlertName, AlertSeverity, 
+                      Description, RemediationSteps, Entities, 
+                      CompromisedEntity, SystemAlertId
+            | order by TimeGenerated desc
+            """
+    
+    # Applied server-side when Config.AZURE_SKIP_BENIGN is set: keeps
+    # warnings/errors and any non-successful result, so the bulk of routine
+    # successful sign-ins never crosses the wire or reaches the model
+    _BENIGN_FILTER = "| where Level in ('Error', 'Warning', 'Critical') or ResultType != '0'"
+    
+    # get_new_events re-requests rows ingested this long before its
+    # watermark, for rows that become visible slightly out of order
+    _INGESTION_OVERLAP = timedelta(seconds=2)
+    
     def __init__(self):
         """Initialize Azure Monitor client"""
         try:
@@ -25,6 +79,25 @@ class AzureLogCollector:
             # Create logs query client
             self.client = LogsQueryClient(self.credential)
             self.workspace_id = Config.AZURE_WORKSPACE_ID
+            benign_filter = self._BENIGN_FILTER if Config.AZURE_SKIP_BENIGN else ''
+            self._events_query = self._SECURITY_EVENT_QUERY.format(
+                benign_filter=benign_filter, ingestion_filter='', ingestion_column=''
+            )
+            # Still holds the {watermark} placeholder of _INGESTION_FILTER
+            self._new_events_query = self._SECURITY_EVENT_QUERY.format(
+                benign_filter=benign_filter,
+                ingestion_filter=self._INGESTION_FILTER,
+                ingestion_column=', ' + self._INGESTION_COLUMN
+            )
+            
+            # Newest ingestion time returned by get_new_events, and the
+            # ingestion time of each row returned within the overlap before
+            # it, keyed by the row's values
+            self._last_ingested = None
+            self._seen = {}
+            # Rows are ingested up to this long after their TimeGenerated,
+            # which bounds the TimeGenerated range each poll has to scan
+            self._lookback = timedelta(seconds=Config.AZURE_INGESTION_LAG)
             
             logger.info(f"Azure Monitor client initialized for workspace {self.workspace_id}")
         except Exception as e:
@@ -48,32 +121,20 @@ class AzureLogCollector:
             end_time = datetime.utcnow()
         
         try:
-            # Query for security events
-            query = """
-            SecurityEvent
-            | union SigninLogs
-            | union AuditLogs
-            | union AzureActivity
-            | where TimeGenerated between (datetime({start}) .. datetime({end}))
-            | project TimeGenerated, EventID, Activity, OperationName, 
-                      ResultType, ResultDescription, IPAddress, 
-                      Identity, Category, Level, ResourceId
-            | order by TimeGenerated desc
-            """.format(
-                start=start_time.strftime('%Y-%m-%dT%H:%M:%S'),
-                end=end_time.strftime('%Y-%m-%dT%H:%M:%S')
-            )
-            
+            # The service restricts TimeGenerated to the timespan (naive times
+            # are UTC here)
             response = self.client.query_workspace(
                 workspace_id=self.workspace_id,
-                query=query,
-                timespan=timedelta(hours=1)
+                query=self._events_query,
+                timespan=(_as_utc(start_time), _as_utc(end_time))
             )
             
             if response.status == LogsQueryStatus.SUCCESS:
                 for table in response.tables:
+                    # Resolved once per table rather than per row
+                    columns = _column_index(table.columns)
                     for row in table.rows:
-                        log_entry = self._parse_log_event(table.columns, row)
+                        log_entry = self._parse_log_event(columns, row)
                         if log_entry:
                             yield log_entry
             else:
@@ -82,41 +143,38 @@ class AzureLogCollector:
         except Exception as e:
             logger.error(f"Error streaming logs from Azure: {e}")
     
-    def _parse_log_event(self, columns: List, row: List) -> Dict:
+    def _parse_log_event(self, columns: Dict[str, int], row) -> Dict:
         """
         Parse and structure an Azure Monitor log event
         
         Args:
-            columns: Column definitions from the query result
+            columns: Column name to row position map of the result table
             row: Row data from the query result
             
         Returns:
             Structured log entry dictionary
         """
         try:
-            # Create a dictionary from columns and row data
-            event_data = {}
-            for i, col in enumerate(columns):
-                if i < len(row):
-                    event_data[col.name] = row[i]
-            
-            # Extract key fields
-            timestamp = event_data.get('TimeGenerated')
-            if isinstance(timestamp, datetime):
-                timestamp = timestamp.isoformat()
+            values = list(row)
+            # Full row kept for the statistical features; built with zip
+            # (column names are the map's keys, in order)
+            event_data = dict(zip(columns, values))
             
+            # Extract key fields. TimeGenerated stays a datetime (the SDK
+            # already parsed it); consumers read it without re-parsing and
+            # orjson serializes it natively
             return {
-                'timestamp': timestamp,
-                'event_id': str(event_data.get('EventID', 'unknown')),
-                'activity': event_data.get('Activity') or event_data.get('OperationName', 'unknown'),
-                'result_type': event_data.get('ResultType', 'unknown'),
-                'ip_address': event_data.get('IPAddress', 'unknown'),
-                'identity': event_data.get('Identity', 'unknown'),
-                'category': event_data.get('Category', 'security'),
-                'level': event_data.get('Level', 'informational'),
+                'timestamp': _field(values, columns, 'TimeGenerated'),
+                'event_id': str(_field(values, columns, 'EventID', 'unknown')),
+                'activity': (_field(values, columns, 'Activity')
+                             or _field(values, columns, 'OperationName', 'unknown')),
+                'result_type': _field(values, columns, 'ResultType', 'unknown'),
+                'ip_address': _field(values, columns, 'IPAddress', 'unknown'),
+                'identity': _field(values, columns, 'Identity', 'unknown'),
+                'category': _field(values, columns, 'Category', 'security'),
+                'level': _field(values, columns, 'Level', 'informational'),
                 'source': 'azure',
-                'message': event_data,
-                'raw_data': event_data
+                'message': event_data
             }
         except Exception as e:
             logger.warning(f"Failed to parse Azure log event: {e}")
@@ -137,6 +195,73 @@ class AzureLogCollector:
         logger.info(f"Retrieved {len(events)} events from Azure Monitor")
         return events
     
+    def get_new_events(self) -> List[Dict]:
+        """
+        Get events ingested since the previous call
+        
+        Polls are watermarked on the workspace ingestion time rather than
+        TimeGenerated: rows can arrive minutes after their TimeGenerated, but
+        each poll only asks the service for rows ingested after the newest
+        one already returned (less a small overlap). The first call starts
+        one minute back. Rows from the overlap that were already returned
+        are dropped by their raw values, before they are parsed.
+        
+        Returns:
+            List of log events not returned before
+        """
+        now = _as_utc(datetime.utcnow())
+        if self._last_ingested is None:
+            after = now - timedelta(minutes=1)
+        else:
+            after = self._last_ingested - self._INGESTION_OVERLAP
+        
+        try:
+            response = self.client.query_workspace(
+                workspace_id=self.workspace_id,
+                query=self._new_events_query.format(
+                    watermark=after.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+                ),
+                # Only bounds the TimeGenerated range the service scans
+                timespan=(after - self._lookback, now)
+            )
+        except Exception as e:
+            logger.error(f"Error streaming logs from Azure: {e}")
+            return []
+        
+        if response.status != LogsQueryStatus.SUCCESS:
+            logger.error(f"Query failed with status: {response.status}")
+            return []
+        
+        events = []
+        seen = self._seen
+        fresh = {}
+        for table in response.tables:
+            columns = _column_index(table.columns)
+            # The ingestion time is the last column, so once its name is
+            # dropped the parser's zip of names and values leaves it out of
+            # the event
+            ingested = columns.pop(self._INGESTION_COLUMN)
+            for row in table.rows:
+                key = tuple(row)
+                if key in seen:
+                    continue
+                
+                fresh[key] = row[ingested]
+                log_entry = self._parse_log_event(columns, row)
+                if log_entry:
+                    events.append(log_entry)
+        
+        if fresh:
+            seen.update(fresh)
+            self._last_ingested = max(seen.values())
+            # Rows ingested before the next poll's overlap can't come back
+            cutoff = self._last_ingested - self._INGESTION_OVERLAP
+            self._seen = {key: ingested_at for key, ingested_at in seen.items()
+                          if ingested_at > cutoff}
+        
+        logger.info(f"Retrieved {len(events)} new events from Azure Monitor")
+        return events
+    
     def get_security_alerts(self, hours: int = 1) -> List[Dict]:
         """
         Get security alerts from Azure Security Center
@@ -150,26 +275,18 @@ class AzureLogCollector:
         try:
             start_time = datetime.utcnow() - timedelta(hours=hours)
             
-            query = """
-            SecurityAlert
-            | where TimeGenerated > ago({hours}h)
-            | project TimeGenerated, AlertName, AlertSeverity, 
-                      Description, RemediationSteps, Entities, 
-                      CompromisedEntity, SystemAlertId
-            | order by TimeGenerated desc
-            """.format(hours=hours)
-            
             response = self.client.query_workspace(
                 workspace_id=self.workspace_id,
-                query=query,
-                timespan=timedelta(hours=hours)
+                query=self._SECURITY_ALERT_QUERY,
+                timespan=(_as_utc(start_time), _as_utc(datetime.utcnow()))
             )
             
             alerts = []
             if response.status == LogsQueryStatus.SUCCESS:
                 for table in response.tables:
+                    columns = _column_index(table.columns)
                     for row in table.rows:
-                        alert = self._parse_security_alert(table.columns, row)
+                        alert = self._parse_security_alert(columns, row)
                         if alert:
                             alerts.append(alert)
             
@@ -180,27 +297,20 @@ class AzureLogCollector:
             logger.error(f"Error retrieving security alerts: {e}")
             return []
     
-    def _parse_security_alert(self, columns: List, row: List) -> Dict:
+    def _parse_security_alert(self, columns: Dict[str, int], row) -> Dict:
         """Parse Azure Security Center alert"""
         try:
-            event_data = {}
-            for i, col in enumerate(columns):
-                if i < len(row):
-                    event_data[col.name] = row[i]
-            
-            timestamp = event_data.get('TimeGenerated')
-            if isinstance(timestamp, datetime):
-                timestamp = timestamp.isoformat()
+            values = list(row)
             
             return {
-                'timestamp': timestamp,
-                'alert_name': event_data.get('AlertName', 'unknown'),
-                'severity': event_data.get('AlertSeverity', 'medium'),
-                'description': event_data.get('Description', ''),
-                'remediation': event_data.get('RemediationSteps', ''),
-                'entities': event_data.get('Entities', []),
-                'compromised_entity': event_data.get('CompromisedEntity', 'unknown'),
-                'alert_id': event_data.get('SystemAlertId', ''),
+                'timestamp': _field(values, columns, 'TimeGenerated'),
+                'alert_name': _field(values, columns, 'AlertName', 'unknown'),
+                'severity': _field(values, columns, 'AlertSeverity', 'medium'),
+                'description': _field(values, columns, 'Description', ''),
+                'remediation': _field(values, columns, 'RemediationSteps', ''),
+                'entities': _field(values, columns, 'Entities', []),
+                'compromised_entity': _field(values, columns, 'CompromisedEntity', 'unknown'),
+                'alert_id': _field(values, columns, 'SystemAlertId', ''),
                 'source': 'azure_security_center'
             }
         except Exception as e:
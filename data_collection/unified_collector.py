@@ -2,7 +2,8 @@
 Unified data collector that aggregates logs from AWS and Azure.
 """
 import threading
-import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import List, Dict
 from loguru import logger
@@ -18,8 +19,14 @@ class UnifiedCollector:
         """Initialize collectors for all cloud providers"""
         self.aws_collector = None
         self.azure_collector = None
-        self.event_queue = queue.Queue(maxsize=10000)
+        # Ring buffer of collected events: deque append/popleft are atomic,
+        # so producers and the consumer need no extra locking, and once full
+        # the oldest events are dropped
+        self.event_queue = deque(maxlen=10000)
         self.running = False
+        # Set by stop_collection; collection threads wait on it between
+        # polls so they exit promptly instead of finishing a sleep
+        self._stop_event = threading.Event()
         
         # Initialize collectors
         try:
@@ -37,6 +44,7 @@ class UnifiedCollector:
     def start_collection(self):
         """Start real-time log collection from all sources"""
         self.running = True
+        self._stop_event.clear()
         
         threads = []
         
@@ -60,45 +68,57 @@ class UnifiedCollector:
     def stop_collection(self):
         """Stop log collection"""
         self.running = False
+        self._stop_event.set()
         logger.info("Stopping log collection")
     
     def _collect_aws_logs(self):
         """Collect logs from AWS CloudWatch"""
-        import time
+        # Prefer CloudWatch live tail: events are pushed once as they arrive
+        # instead of re-polling an overlapping window
+        live_tail = self.aws_collector.supports_live_tail()
         
         while self.running:
             try:
-                events = self.aws_collector.get_recent_events(minutes=1)
-                for event in events:
-                    if not self.event_queue.full():
-                        self.event_queue.put(event)
-                    else:
-                        logger.warning("Event queue is full, dropping event")
+                if live_tail:
+                    events = self.aws_collector.tail_logs(should_stop=self._stop_event.is_set)
+                else:
+                    events = self.aws_collector.get_recent_events(minutes=1)
                 
-                time.sleep(10)  # Poll every 10 seconds
+                self._buffer_events(events)
+                
+                # A finished live tail session is restarted right away
+                if not live_tail:
+                    self._stop_event.wait(10)  # Poll every 10 seconds
                 
             except Exception as e:
-                logger.error(f"Error in AWS collection thread: {e}")
-                time.sleep(30)  # Wait before retrying
+                if live_tail:
+                    logger.warning(f"AWS live tail failed, falling back to polling: {e}")
+                    live_tail = False
+                else:
+                    logger.error(f"Error in AWS collection thread: {e}")
+                self._stop_event.wait(30)  # Wait before retrying
     
     def _collect_azure_logs(self):
         """Collect logs from Azure Monitor"""
-        import time
-        
         while self.running:
             try:
-                events = self.azure_collector.get_recent_events(minutes=1)
-                for event in events:
-                    if not self.event_queue.full():
-                        self.event_queue.put(event)
-                    else:
-                        logger.warning("Event queue is full, dropping event")
+                # Incremental: only events newer than the last poll
+                events = self.azure_collector.get_new_events()
+                self._buffer_events(events)
                 
-                time.sleep(10)  # Poll every 10 seconds
+                self._stop_event.wait(10)  # Poll every 10 seconds
                 
             except Exception as e:
                 logger.error(f"Error in Azure collection thread: {e}")
-                time.sleep(30)  # Wait before retrying
+                self._stop_event.wait(30)  # Wait before retrying
+    
+    def _buffer_events(self, events):
+        """Append collected events to the ring buffer"""
+        buffer = self.event_queue
+        for event in events:
+            if len(buffer) == buffer.maxlen:
+                logger.warning("Event queue is full, dropping oldest event")
+            buffer.append(event)
     
     def get_events(self, max_events: int = 100) -> List[Dict]:
         """
@@ -110,22 +130,12 @@ class UnifiedCollector:
         Returns:
             List of security events
         """
-        events = []
-        count = 0
-        
-        while count < max_events and not self.event_queue.empty():
-            try:
-                event = self.event_queue.get_nowait()
-                events.append(event)
-                count += 1
-            except queue.Empty:
-                break
-        
-        return events
+        popleft = self.event_queue.popleft
+        return [popleft() for _ in range(min(max_events, len(self.event_queue)))]
     
     def get_queue_size(self) -> int:
         """Get current size of the event queue"""
-        return self.event_queue.qsize()
+        return len(self.event_queue)
     
     def collect_batch(self, minutes: int = 5) -> List[Dict]:
         """
@@ -139,23 +149,28 @@ class UnifiedCollector:
         """
         all_events = []
         
-        # Collect from AWS
-        if self.aws_collector:
-            try:
-                aws_events = self.aws_collector.get_recent_events(minutes=minutes)
-                all_events.extend(aws_events)
-                logger.info(f"Collected {len(aws_events)} events from AWS")
-            except Exception as e:
-                logger.error(f"Error collecting from AWS: {e}")
+        collectors = {
+            name: collector
+            for name, collector in (('AWS', self.aws_collector), ('Azure', self.azure_collector))
+            if collector
+        }
         
-        # Collect from Azure
-        if self.azure_collector:
-            try:
-                azure_events = self.azure_collector.get_recent_events(minutes=minutes)
-                all_events.extend(azure_events)
-                logger.info(f"Collected {len(azure_events)} events from Azure")
-            except Exception as e:
-                logger.error(f"Error collecting from Azure: {e}")
+        # Query the clouds concurrently: the batch takes as long as the
+        # slower provider rather than the sum of both
+        if collectors:
+            with ThreadPoolExecutor(max_workers=len(collectors)) as executor:
+                futures = {
+                    executor.submit(collector.get_recent_events, minutes=minutes): name
+                    for name, collector in collectors.items()
+                }
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        events = future.result()
+                        all_events.extend(events)
+                        logger.info(f"Collected {len(events)} events from {name}")
+                    except Exception as e:
+                        logger.error(f"Error collecting from {name}: {e}")
         
         logger.info(f"Total events collected: {len(all_events)}")
         return all_events
@@ -2,39 +2,60 @@
 """
 Demo script to demonstrate the system with simulated security events.
 """
+import os
 import time
 import random
 from datetime import datetime
+from typing import List
+import numpy as np
 from loguru import logger
 
 from preprocessing import LogPreprocessor
 from ml_detection import ThreatDetector, TrainingDataGenerator
 from alerts import AlertManager
 
+# Pause between generated events so they can be read as they appear.
+# Off by default so the demo also works as a quick pipeline benchmark.
+DEMO_SLOW = os.getenv('DEMO_SLOW', 'false').lower() == 'true'
 
-def generate_demo_event(is_threat: bool = False) -> dict:
-    """Generate a demo security event"""
+_DEMO_SOURCES = ('aws', 'azure')
+
+# Request line of a suspicious event. It probes several attack classes at
+# once (XSS, path traversal, SQL injection, command injection and code
+# execution), like the scanner traffic the model's suspicious training
+# samples stand for; a lone SQL injection string scores too low on the
+# other pattern features to be flagged
+_DEMO_ATTACK = (
+    "GET /search?q=<script>alert(1)</script>&file=../../etc/passwd"
+    "&id=1' OR '1'='1; cmd.exe /c eval(base64_decode('...'))"
+)
+_rng = np.random.default_rng()
+
+
+def _build_demo_event(is_threat: bool, source: str, event_number: int,
+                      octets: List[int], timestamp: str) -> dict:
+    """Assemble a demo event from already drawn random values"""
     event = {
-        'timestamp': datetime.utcnow().isoformat(),
-        'source': random.choice(['aws', 'azure']),
-        'event_id': f"EVT-{random.randint(1000, 9999)}",
+        'timestamp': timestamp,
+        'source': source,
+        'event_id': f"EVT-{event_number}",
         'log_stream': 'demo-stream',
     }
     
     if is_threat:
         # Suspicious event
         event['message'] = {
-            'ip_address': f"{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}",
+            'ip_address': f"{octets[0]}.{octets[1]}.{octets[2]}.{octets[3]}",
             'user_agent': 'sqlmap/1.0',
             'activity': 'Failed Login Attempt',
-            'raw_message': "SELECT * FROM users WHERE id=1' OR '1'='1"
+            'raw_message': _DEMO_ATTACK
         }
         event['activity'] = 'Suspicious Activity'
         event['ip_address'] = event['message']['ip_address']
     else:
         # Normal event
         event['message'] = {
-            'ip_address': f"192.168.{random.randint(1, 255)}.{random.randint(1, 255)}",
+            'ip_address': f"192.168.{octets[2]}.{octets[3]}",
             'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
             'activity': 'Successful Login',
             'raw_message': "User logged in successfully"
@@ -45,6 +66,56 @@ def generate_demo_event(is_threat: bool = False) -> dict:
     return event
 
 
+def generate_demo_event(is_threat: bool = False, timestamp: str = None) -> dict:
+    """
+    Generate a demo security event
+    
+    Args:
+        is_threat: Whether to generate a suspicious event
+        timestamp: ISO timestamp to use (default: now)
+        
+    Returns:
+        Demo event dictionary
+    """
+    return _build_demo_event(
+        is_threat,
+        random.choice(_DEMO_SOURCES),
+        random.randint(1000, 9999),
+        [random.randint(1, 255) for _ in range(4)],
+        timestamp or datetime.utcnow().isoformat()
+    )
+
+
+def generate_demo_events(num_events: int, threat_prob: float = 0.3,
+                         timestamp: str = None) -> List[dict]:
+    """
+    Generate a batch of demo security events
+    
+    All random values for the batch are drawn with a few vectorized NumPy
+    calls rather than several random module calls per event.
+    
+    Args:
+        num_events: Number of events to generate
+        threat_prob: Probability of each event being suspicious
+        timestamp: ISO timestamp shared by the batch (default: now)
+        
+    Returns:
+        List of demo event dictionaries
+    """
+    timestamp = timestamp or datetime.utcnow().isoformat()
+    
+    is_threat = (_rng.random(num_events) < threat_prob).tolist()
+    sources = _rng.integers(0, len(_DEMO_SOURCES), size=num_events).tolist()
+    event_numbers = _rng.integers(1000, 10000, size=num_events).tolist()
+    octets = _rng.integers(1, 256, size=(num_events, 4)).tolist()
+    
+    return [
+        _build_demo_event(is_threat[i], _DEMO_SOURCES[sources[i]],
+                          event_numbers[i], octets[i], timestamp)
+        for i in range(num_events)
+    ]
+
+
 def run_demo():
     """Run system demonstration"""
     logger.info("="*60)
@@ -70,74 +141,76 @@ def run_demo():
     
     # Generate and process demo events
     num_events = 20
-    events = []
     
-    for i in range(num_events):
-        # 30% chance of threat
-        is_threat = random.random() < 0.3
-        event = generate_demo_event(is_threat=is_threat)
-        events.append(event)
-        
+    # 30% chance of threat
+    events = generate_demo_events(num_events, threat_prob=0.3)
+    
+    for i, event in enumerate(events):
         logger.info(f"\nEvent {i+1}/{num_events}:")
         logger.info(f"  Source: {event['source']}")
         logger.info(f"  Activity: {event['activity']}")
         logger.info(f"  IP: {event['ip_address']}")
         
-        time.sleep(0.5)
+        if DEMO_SLOW:
+            time.sleep(0.5)
     
     logger.info("\n" + "="*60)
     logger.info("Processing events through ML pipeline...")
     logger.info("="*60)
     
-    # Process all events
-    feature_array, normalized_df = preprocessor.process_batch(events)
-    
-    if len(feature_array) > 0:
-        # Detect threats
-        threat_results = detector.detect_threats(feature_array)
-        
-        # Generate alerts
-        alerts = alert_manager.generate_batch_alerts(events, threat_results)
-        
-        # Display results
-        logger.info(f"\n✓ Processed {len(events)} events")
-        logger.info(f"✓ Extracted {len(feature_array)} feature vectors")
-        logger.info(f"✓ Detected {sum(1 for r in threat_results if r['is_threat'])} threats")
-        logger.info(f"✓ Generated {len(alerts)} alerts")
+    try:
+        # Process all events
+        feature_array, normalized_df = preprocessor.process_batch(events)
         
-        # Display alerts
-        if alerts:
+        if len(feature_array) > 0:
+            # Detect threats
+            threat_results = detector.detect_threats(feature_array)
+            
+            # Generate alerts
+            alerts = alert_manager.generate_batch_alerts(events, threat_results)
+            
+            # Display results
+            logger.info(f"\n✓ Processed {len(events)} events")
+            logger.info(f"✓ Extracted {len(feature_array)} feature vectors")
+            logger.info(f"✓ Detected {sum(1 for r in threat_results if r['is_threat'])} threats")
+            logger.info(f"✓ Generated {len(alerts)} alerts")
+            
+            # Display alerts
+            if alerts:
+                logger.info("\n" + "="*60)
+                logger.info("GENERATED ALERTS")
+                logger.info("="*60)
+                
+                for alert in alerts:
+                    logger.warning(f"\n🚨 {alert['severity'].upper()} Alert:")
+                    logger.warning(f"  ID: {alert['alert_id']}")
+                    logger.warning(f"  Confidence: {alert['confidence']*100:.1f}%")
+                    logger.warning(f"  Source: {alert['source']}")
+                    logger.warning(f"  Description: {alert['description']}")
+                    logger.warning(f"  Recommendations: {alert['recommendations'][0]}")
+            
+            # Display statistics
+            stats = alert_manager.get_alert_statistics()
             logger.info("\n" + "="*60)
-            logger.info("GENERATED ALERTS")
+            logger.info("ALERT STATISTICS")
             logger.info("="*60)
+            logger.info(f"Total Alerts: {stats['total_alerts']}")
+            logger.info(f"Active Alerts: {stats['active_alerts']}")
+            logger.info(f"By Severity: {stats['by_severity']}")
             
-            for alert in alerts:
-                logger.warning(f"\n🚨 {alert['severity'].upper()} Alert:")
-                logger.warning(f"  ID: {alert['alert_id']}")
-                logger.warning(f"  Confidence: {alert['confidence']*100:.1f}%")
-                logger.warning(f"  Source: {alert['source']}")
-                logger.warning(f"  Description: {alert['description']}")
-                logger.warning(f"  Recommendations: {alert['recommendations'][0]}")
-        
-        # Display statistics
-        stats = alert_manager.get_alert_statistics()
-        logger.info("\n" + "="*60)
-        logger.info("ALERT STATISTICS")
-        logger.info("="*60)
-        logger.info(f"Total Alerts: {stats['total_alerts']}")
-        logger.info(f"Active Alerts: {stats['active_alerts']}")
-        logger.info(f"By Severity: {stats['by_severity']}")
-        
-        # Display summary stats
-        summary = preprocessor.create_summary_stats(normalized_df)
-        logger.info("\n" + "="*60)
-        logger.info("EVENT SUMMARY")
-        logger.info("="*60)
-        logger.info(f"Total Events: {summary.get('total_events', 0)}")
-        logger.info(f"Failure Rate: {summary.get('failure_rate', 0)*100:.1f}%")
-        logger.info(f"Avg Malicious Score: {summary.get('avg_malicious_score', 0):.3f}")
-        logger.info(f"Suspicious Agents: {summary.get('suspicious_agents', 0)}")
-        
+            # Display summary stats
+            summary = preprocessor.create_summary_stats(normalized_df)
+            logger.info("\n" + "="*60)
+            logger.info("EVENT SUMMARY")
+            logger.info("="*60)
+            logger.info(f"Total Events: {summary.get('total_events', 0)}")
+            logger.info(f"Failure Rate: {summary.get('failure_rate', 0)*100:.1f}%")
+            logger.info(f"Avg Malicious Score: {summary.get('avg_malicious_score', 0):.3f}")
+            logger.info(f"Suspicious Agents: {summary.get('suspicious_agents', 0)}")
+    finally:
+        # Deliver any alerts still queued for distribution
+        alert_manager.shutdown()
+    
     logger.info("\n" + "="*60)
     logger.info("DEMO COMPLETE")
     logger.info("="*60)
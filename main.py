@@ -3,8 +3,8 @@
 Main application entry point for the Real-Time Threat Detection System.
 """
 import sys
-import time
 import threading
+import numpy as np
 from loguru import logger
 
 from config import Config
@@ -14,6 +14,9 @@ from ml_detection import ThreatDetector, TrainingDataGenerator
 from alerts import AlertManager
 from dashboard import ThreatDashboard
 
+# Events taken from the collector per processing cycle
+_BATCH_SIZE = 100
+
 
 class ThreatDetectionSystem:
     """Main threat detection system orchestrator"""
@@ -33,6 +36,13 @@ class ThreatDetectionSystem:
         
         self.running = False
         self.events_processed = 0
+        # Feature rows of each batch are written here instead of a new array
+        # per cycle; float32 is the dtype the forest evaluates on anyway
+        self._feature_buf = np.empty(
+            (_BATCH_SIZE, TrainingDataGenerator().num_features), dtype=np.float32
+        )
+        # Set by stop_collection to wake the processing thread from its wait
+        self._stop_event = threading.Event()
         
         logger.info("System initialized successfully")
     
@@ -46,7 +56,7 @@ class ThreatDetectionSystem:
             X, y = generator.generate_training_data(num_normal=2000, num_suspicious=1000)
             
             # Train model
-            metrics = self.detector.train(X, y)
+            metrics = self.detector.train(X, y, verbose_metrics=True)
             
             logger.info(f"Model training complete - Accuracy: {metrics.get('accuracy', 0):.4f}")
             logger.info(f"Classification Report: {metrics.get('classification_report', {})}")
@@ -61,6 +71,7 @@ class ThreatDetectionSystem:
         """Start data collection from cloud sources"""
         logger.info("Starting data collection...")
         self.running = True
+        self._stop_event.clear()
         
         # Start collectors
         collection_threads = self.collector.start_collection()
@@ -79,20 +90,21 @@ class ThreatDetectionSystem:
         while self.running:
             try:
                 # Get events from collector
-                events = self.collector.get_events(max_events=100)
+                events = self.collector.get_events(max_events=_BATCH_SIZE)
                 
                 if events:
                     logger.info(f"Processing {len(events)} events...")
                     
                     # Normalize and preprocess
-                    feature_array, normalized_df = self.preprocessor.process_batch(events)
+                    feature_array, normalized_df = self.preprocessor.process_batch(
+                        events, out=self._feature_buf
+                    )
                     
                     if len(feature_array) > 0:
-                        # Detect threats
-                        threat_results = self.detector.detect_threats(feature_array)
-                        
-                        # Generate alerts for threats
-                        alerts = self.alert_manager.generate_batch_alerts(events, threat_results)
+                        # Detect threats and generate their alerts
+                        alerts = self.detector.detect_and_alert(
+                            feature_array, events, self.alert_manager
+                        )
                         
                         self.events_processed += len(events)
                         
@@ -102,16 +114,17 @@ class ThreatDetectionSystem:
                             logger.info(f"No threats detected in {len(events)} events")
                 
                 # Sleep before next batch
-                time.sleep(5)
+                self._stop_event.wait(5)
                 
             except Exception as e:
                 logger.error(f"Error processing events: {e}")
-                time.sleep(10)
+                self._stop_event.wait(10)
     
     def stop_collection(self):
         """Stop data collection"""
         logger.info("Stopping data collection...")
         self.running = False
+        self._stop_event.set()
         self.collector.stop_collection()
         logger.info("Data collection stopped")
     
@@ -215,11 +228,13 @@ def main():
         
     except KeyboardInterrupt:
         logger.info("\nShutdown requested...")
-        system.stop_collection()
-        logger.info("System stopped")
     except Exception as e:
         logger.error(f"System error: {e}")
+    finally:
+        # Also on errors, so alerts still queued for distribution are delivered
         system.stop_collection()
+        system.alert_manager.shutdown()
+        logger.info("System stopped")
 
 
 if __name__ == "__main__":
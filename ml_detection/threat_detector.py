@@ -2,19 +2,47 @@
 Machine Learning threat detection engine using Random Forest classifier.
 """
 import os
+import time
 import joblib
+from functools import lru_cache
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
-from typing import List, Dict, Tuple, Any
+from sklearn.metrics import classification_report, accuracy_score
+from typing import List, Dict, Tuple, Any, TYPE_CHECKING
 from loguru import logger
 from config import Config
 
+if TYPE_CHECKING:
+    from alerts.alert_manager import AlertManager
+
+# Below this many rows the forest is evaluated on the calling thread: for
+# the live loop's small batches, dispatching the trees to a thread pool
+# costs more than traversing them
+_PARALLEL_PREDICT_ROWS = 1000
+
+# Saved models are LZ4-compressed when lz4 is installed (it decompresses
+# about as fast as the larger raw file is read) and stored uncompressed
+# otherwise: zlib shrinks the file further but measurably slows every load
+try:
+    import lz4  # noqa: F401 (only joblib uses it)
+    _MODEL_COMPRESS = ('lz4', 3)
+except ImportError:
+    _MODEL_COMPRESS = 0
+
+# Single-row predictions are memoized by row contents: one-off calls pay
+# the forest's fixed per-call overhead, and identical rows recur (repeated
+# events from the same source produce the same features)
+_ROW_CACHE_SIZE = 4096
+
 
 class ThreatDetector:
     """ML-based threat detection using Random Forest"""
     
+    # Saved alongside the model; bump when the feature schema or model
+    # settings change so stale model files are retrained instead of loaded
+    MODEL_VERSION = 2
+    
     def __init__(self, model_path: str = None):
         """
         Initialize threat detector
@@ -26,24 +54,34 @@ class ThreatDetector:
         self.model = None
         self.is_trained = False
         self.feature_importance = None
+        self._row_proba = lru_cache(maxsize=_ROW_CACHE_SIZE)(self._predict_row_proba)
         
         # Try to load existing model
         if os.path.exists(self.model_path):
             self.load_model()
-        else:
-            # Initialize new model
-            self.model = RandomForestClassifier(
-                n_estimators=100,
-                max_depth=10,
-                min_samples_split=5,
-                min_samples_leaf=2,
-                random_state=42,
-                n_jobs=-1,
-                class_weight='balanced'
-            )
-            logger.info("Initialized new Random Forest model")
+        
+        if not self.is_trained:
+            self._init_model()
+    
+    def _init_model(self):
+        """Initialize a new, untrained model"""
+        # Prediction cost grows with the number and depth of trees; past ~64
+        # trees accuracy gains are negligible (the synthetic set is separated
+        # perfectly at depth 8), so the forest is kept small for latency
+        self.model = RandomForestClassifier(
+            n_estimators=64,
+            max_depth=8,
+            max_features='sqrt',
+            min_samples_split=5,
+            min_samples_leaf=2,
+            random_state=42,
+            n_jobs=-1,
+            class_weight='balanced'
+        )
+        logger.info("Initialized new Random Forest model")
     
-    def train(self, X: np.ndarray, y: np.ndarray, test_size: float = 0.2) -> Dict[str, Any]:
+    def train(self, X: np.ndarray, y: np.ndarray, test_size: float = 0.2,
+              verbose_metrics: bool = False) -> Dict[str, Any]:
         """
         Train the Random Forest model
         
@@ -51,6 +89,7 @@ class ThreatDetector:
             X: Feature array
             y: Label array (0 = normal, 1 = suspicious)
             test_size: Proportion of data for testing
+            verbose_metrics: Also compute the per-class classification report
             
         Returns:
             Dictionary containing training metrics
@@ -63,9 +102,11 @@ class ThreatDetector:
                 X, y, test_size=test_size, random_state=42, stratify=y
             )
             
-            # Train model
+            # Train model (on all cores, whatever the last prediction used)
+            self.model.n_jobs = -1
             self.model.fit(X_train, y_train)
             self.is_trained = True
+            self._row_proba.cache_clear()
             
             # Calculate feature importance
             self.feature_importance = self.model.feature_importances_
@@ -75,11 +116,17 @@ class ThreatDetector:
             
             metrics = {
                 'accuracy': accuracy_score(y_test, y_pred),
-                'classification_report': classification_report(y_test, y_pred, output_dict=True),
-                'confusion_matrix': confusion_matrix(y_test, y_pred).tolist(),
+                # Labels are 0/1, so each (true, predicted) pair is one bin
+                'confusion_matrix': np.bincount(
+                    2 * y_test.astype(np.int64) + y_pred.astype(np.int64), minlength=4
+                ).reshape(2, 2).tolist(),
                 'train_samples': len(X_train),
                 'test_samples': len(X_test)
             }
+            if verbose_metrics:
+                metrics['classification_report'] = classification_report(
+                    y_test, y_pred, output_dict=True
+                )
             
             logger.info(f"Model trained with accuracy: {metrics['accuracy']:.4f}")
             
@@ -106,7 +153,16 @@ class ThreatDetector:
             logger.warning("Model not trained, returning all normal predictions")
             return np.zeros(len(X), dtype=int)
         
+        if len(X) == 0:
+            return np.zeros(0, dtype=int)
+        
         try:
+            if len(X) == 1:
+                # Same argmax over the class probabilities predict() takes
+                probabilities = self._cached_proba(X)
+                return self.model.classes_.take(np.argmax(probabilities, axis=1))
+            
+            self._set_predict_jobs(len(X))
             predictions = self.model.predict(X)
             logger.debug(f"Made predictions for {len(X)} samples")
             return predictions
@@ -129,7 +185,14 @@ class ThreatDetector:
             logger.warning("Model not trained, returning neutral probabilities")
             return np.array([[0.5, 0.5]] * len(X))
         
+        if len(X) == 0:
+            return np.empty((0, 2))
+        
         try:
+            if len(X) == 1:
+                return self._cached_proba(X)
+            
+            self._set_predict_jobs(len(X))
             probabilities = self.model.predict_proba(X)
             logger.debug(f"Generated probabilities for {len(X)} samples")
             return probabilities
@@ -138,6 +201,42 @@ class ThreatDetector:
             logger.error(f"Error generating probabilities: {e}")
             return np.array([[0.5, 0.5]] * len(X))
     
+    def _cached_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities of a single-row X, memoized by row contents"""
+        X = np.asarray(X)
+        # A copy, so callers can't modify the cached result
+        return self._row_proba(X.dtype.str, X.tobytes()).copy()
+    
+    def _predict_row_proba(self, dtype: str, row: bytes) -> np.ndarray:
+        """Evaluate the forest on one row given as raw bytes (cache miss)"""
+        self._set_predict_jobs(1)
+        return self.model.predict_proba(np.frombuffer(row, dtype=dtype).reshape(1, -1))
+    
+    def _set_predict_jobs(self, num_rows: int):
+        """Evaluate in parallel only for batches large enough to benefit"""
+        self.model.n_jobs = -1 if num_rows >= _PARALLEL_PREDICT_ROWS else 1
+    
+    def _score(self, X: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Evaluate the forest once and derive everything detection needs
+        
+        Args:
+            X: Feature array
+            threshold: Confidence threshold
+            
+        Returns:
+            Tuple of (threat probabilities, predicted-threat mask, mask of
+            probabilities at or above the threshold)
+        """
+        probabilities = self.predict_proba(X)
+        threat_probs = probabilities[:, 1]  # Probability of being suspicious
+        
+        # Same labels as predict() without a second pass over the trees:
+        # predict takes the argmax class, which picks normal on a tie
+        is_threat = threat_probs > probabilities[:, 0]
+        
+        return threat_probs, is_threat, threat_probs >= threshold
+    
     def detect_threats(self, X: np.ndarray, threshold: float = None) -> List[Dict[str, Any]]:
         """
         Detect threats in input data with confidence scores
@@ -153,26 +252,26 @@ class ThreatDetector:
             threshold = Config.CONFIDENCE_THRESHOLD
         
         try:
-            # Get predictions and probabilities
-            predictions = self.predict(X)
-            probabilities = self.predict_proba(X)
-            
-            results = []
-            for i in range(len(X)):
-                threat_prob = probabilities[i][1]  # Probability of being suspicious
-                
-                result = {
+            # Evaluate per-row conditions on whole arrays; tolist() then
+            # yields plain Python scalars for the result records
+            threat_probs, is_threat, exceeds = self._score(X, threshold)
+            predictions = is_threat.astype(int)
+            
+            results = [
+                {
                     'index': i,
-                    'is_threat': bool(predictions[i] == 1),
-                    'confidence': float(threat_prob),
-                    'prediction': int(predictions[i]),
-                    'exceeds_threshold': bool(threat_prob >= threshold)
+                    'is_threat': threat,
+                    'confidence': confidence,
+                    'prediction': prediction,
+                    'exceeds_threshold': exceeded
                 }
-                
-                results.append(result)
+                for i, (threat, confidence, prediction, exceeded) in enumerate(zip(
+                    is_threat.tolist(), threat_probs.tolist(),
+                    predictions.tolist(), exceeds.tolist()
+                ))
+            ]
             
-            threat_count = sum(1 for r in results if r['is_threat'])
-            logger.info(f"Detected {threat_count}/{len(results)} threats")
+            logger.info(f"Detected {int(is_threat.sum())}/{len(results)} threats")
             
             return results
             
@@ -180,14 +279,58 @@ class ThreatDetector:
             logger.error(f"Error detecting threats: {e}")
             return []
     
+    def detect_and_alert(self, X: np.ndarray, events: List[Dict],
+                         alert_manager: 'AlertManager', threshold: float = None) -> List[Dict]:
+        """
+        Detect threats and generate their alerts in a single pass
+        
+        Unlike detect_threats followed by generate_batch_alerts, result
+        records are only built for flagged events.
+        
+        Args:
+            X: Feature array, one row per event
+            events: Event dictionaries matching the rows of X
+            alert_manager: Alert manager that records and delivers the alerts
+            threshold: Confidence threshold (default from config)
+            
+        Returns:
+            List of generated alerts
+        """
+        if threshold is None:
+            threshold = Config.CONFIDENCE_THRESHOLD
+        
+        try:
+            threat_probs, is_threat, exceeds = self._score(X, threshold)
+            
+            threat_results = [
+                {
+                    'index': int(i),
+                    'is_threat': bool(is_threat[i]),
+                    'confidence': float(threat_probs[i]),
+                    'prediction': int(is_threat[i]),
+                    'exceeds_threshold': bool(exceeds[i])
+                }
+                for i in np.flatnonzero(is_threat | exceeds)
+            ]
+            
+            logger.info(f"Detected {int(is_threat.sum())}/{len(X)} threats")
+            
+            return alert_manager.generate_batch_alerts(events, threat_results)
+            
+        except Exception as e:
+            logger.error(f"Error detecting threats: {e}")
+            return []
+    
     def save_model(self):
         """Save trained model to disk"""
         try:
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
             
-            # Save model
-            joblib.dump(self.model, self.model_path)
+            # Save model with the version it was trained for (joblib.load
+            # detects the compression, so files saved either way still load)
+            joblib.dump({'version': self.MODEL_VERSION, 'model': self.model},
+                        self.model_path, compress=_MODEL_COMPRESS)
             logger.info(f"Model saved to {self.model_path}")
             
         except Exception as e:
@@ -196,8 +339,18 @@ class ThreatDetector:
     def load_model(self):
         """Load trained model from disk"""
         try:
-            self.model = joblib.load(self.model_path)
+            saved = joblib.load(self.model_path)
+            
+            version = saved.get('version') if isinstance(saved, dict) else None
+            if version != self.MODEL_VERSION:
+                logger.warning(f"Ignoring outdated model at {self.model_path} "
+                               f"(version {version}, expected {self.MODEL_VERSION})")
+                self.is_trained = False
+                return
+            
+            self.model = saved['model']
             self.is_trained = True
+            self._row_proba.cache_clear()
             
             # Load feature importance if available
             if hasattr(self.model, 'feature_importances_'):
@@ -242,17 +395,15 @@ class ThreatDetector:
         Returns:
             True if retraining is needed
         """
-        if not os.path.exists(self.model_path):
-            return True
-        
         try:
-            # Check file age
-            import time
-            file_age = time.time() - os.path.getmtime(self.model_path)
+            # Check file age (a single stat; a missing file means no model yet)
+            file_age = time.time() - os.stat(self.model_path).st_mtime
             
             # Retrain if older than configured interval
             return file_age > Config.RETRAIN_INTERVAL
             
+        except FileNotFoundError:
+            return True
         except Exception as e:
             logger.error(f"Error checking model age: {e}")
             return False
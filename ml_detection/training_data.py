@@ -4,14 +4,23 @@ Training data generator for creating initial training dataset.
 import numpy as np
 from typing import Tuple
 from loguru import logger
+from preprocessing.feature_extractor import FEATURE_NAMES
 
 
 class TrainingDataGenerator:
     """Generates synthetic training data for initial model training"""
     
-    def __init__(self):
-        """Initialize training data generator"""
-        self.num_features = 25  # Match the features from FeatureExtractor
+    def __init__(self, seed: int = None):
+        """
+        Initialize training data generator
+        
+        Args:
+            seed: Seed for reproducible data (default: fresh entropy)
+        """
+        self.num_features = len(FEATURE_NAMES)  # Match the features from FeatureExtractor
+        # A per-instance Generator rather than the legacy global np.random
+        # state: faster draws and no shared state between generators
+        self._rng = np.random.default_rng(seed)
     
     def generate_training_data(self, 
                                num_normal: int = 1000, 
@@ -24,111 +33,100 @@ class TrainingDataGenerator:
             num_suspicious: Number of suspicious samples to generate
             
         Returns:
-            Tuple of (features, labels)
+            Tuple of (float32 features, labels)
         """
         logger.info(f"Generating {num_normal} normal and {num_suspicious} suspicious samples")
         
+        # Samples are written straight into one preallocated array instead
+        # of per-sample lists that are converted and stacked afterwards.
+        # float32 is what the forest converts its input to anyway, and every
+        # feature (hashes are below 2**24) is exact in it
+        X = np.empty((num_normal + num_suspicious, self.num_features), dtype=np.float32)
+        
         # Generate normal traffic patterns
-        normal_samples = self._generate_normal_samples(num_normal)
+        self._generate_normal_samples(X[:num_normal])
         
         # Generate suspicious traffic patterns
-        suspicious_samples = self._generate_suspicious_samples(num_suspicious)
+        self._generate_suspicious_samples(X[num_normal:])
         
-        # Combine and create labels
-        X = np.vstack([normal_samples, suspicious_samples])
-        y = np.array([0] * num_normal + [1] * num_suspicious)
+        # Create labels
+        y = np.concatenate([
+            np.zeros(num_normal, dtype=int),
+            np.ones(num_suspicious, dtype=int)
+        ])
         
         # Shuffle
-        indices = np.random.permutation(len(X))
+        indices = self._rng.permutation(len(X))
         X = X[indices]
         y = y[indices]
         
         logger.info(f"Generated {len(X)} total samples with {X.shape[1]} features")
         return X, y
     
-    def _generate_normal_samples(self, num_samples: int) -> np.ndarray:
-        """Generate normal traffic samples"""
-        samples = []
-        
-        for _ in range(num_samples):
-            sample = [
-                np.random.randint(8, 18),  # hour (business hours)
-                np.random.randint(0, 5),   # day_of_week (weekday)
-                0,  # is_weekend
-                1,  # is_business_hours
-                0,  # is_night
-                np.random.randint(0, 100000),  # ip_address_hash
-                np.random.choice([0, 1], p=[0.9, 0.1]),  # is_private_ip
-                np.random.uniform(0.7, 1.0),  # ip_reputation_score
-                0,  # is_suspicious_agent
-                np.random.randint(50, 200),  # user_agent_length
-                np.random.randint(0, 100000),  # event_id_hash
-                np.random.randint(0, 100000),  # activity_hash
-                np.random.randint(0, 100000),  # category_hash
-                np.random.choice([0, 1], p=[0.95, 0.05]),  # is_failure
-                np.random.choice([0, 1], p=[0.05, 0.95]),  # is_success
-                np.random.randint(0, 100000),  # identity_hash
-                1,  # has_identity
-                0.0,  # sql_injection_score
-                0.0,  # xss_score
-                0.0,  # path_traversal_score
-                0.0,  # command_injection_score
-                0.0,  # code_execution_score
-                0.0,  # overall_malicious_score
-                np.random.randint(100, 500),  # message_length
-                np.random.randint(5, 30),  # num_special_chars
-                np.random.uniform(2.0, 4.0),  # entropy
-            ]
-            samples.append(sample)
+    def _generate_normal_samples(self, out: np.ndarray) -> None:
+        """Fill out with normal traffic samples, one column at a time"""
+        n = len(out)
+        rng = self._rng
         
-        return np.array(samples)
+        out[:, 0] = rng.integers(8, 18, n)  # hour (business hours)
+        out[:, 1] = rng.integers(0, 5, n)   # day_of_week (weekday)
+        out[:, 2] = 0  # is_weekend
+        out[:, 3] = 1  # is_business_hours
+        out[:, 4] = 0  # is_night
+        out[:, 5] = rng.integers(0, 100000, n)  # ip_address_hash
+        out[:, 6] = rng.random(n) < 0.1  # is_private_ip
+        out[:, 7] = rng.uniform(0.7, 1.0, n)  # ip_reputation_score
+        out[:, 8] = 0  # is_suspicious_agent
+        out[:, 9] = rng.integers(50, 200, n)  # user_agent_length
+        out[:, 10] = rng.integers(0, 100000, n)  # event_id_hash
+        out[:, 11] = rng.integers(0, 100000, n)  # activity_hash
+        out[:, 12] = rng.integers(0, 100000, n)  # category_hash
+        out[:, 13] = rng.random(n) < 0.05  # is_failure
+        out[:, 14] = rng.random(n) < 0.95  # is_success
+        out[:, 15] = rng.integers(0, 100000, n)  # identity_hash
+        out[:, 16] = 1  # has_identity
+        out[:, 17:23] = 0.0  # pattern scores and overall_malicious_score
+        out[:, 23] = rng.integers(100, 500, n)  # message_length
+        out[:, 24] = rng.integers(5, 30, n)  # num_special_chars
+        out[:, 25] = rng.uniform(2.0, 4.0, n)  # entropy
     
-    def _generate_suspicious_samples(self, num_samples: int) -> np.ndarray:
-        """Generate suspicious traffic samples"""
-        samples = []
-        
-        for _ in range(num_samples):
-            sample = [
-                np.random.choice([np.random.randint(0, 6), np.random.randint(22, 24)]),  # hour (off-hours)
-                np.random.randint(0, 7),  # day_of_week
-                np.random.choice([0, 1], p=[0.5, 0.5]),  # is_weekend
-                0,  # is_business_hours
-                1,  # is_night
-                np.random.randint(0, 100000),  # ip_address_hash
-                np.random.choice([0, 1], p=[0.3, 0.7]),  # is_private_ip (more external)
-                np.random.uniform(0.1, 0.4),  # ip_reputation_score (low reputation)
-                np.random.choice([0, 1], p=[0.3, 0.7]),  # is_suspicious_agent
-                np.random.randint(20, 100),  # user_agent_length (shorter)
-                np.random.randint(0, 100000),  # event_id_hash
-                np.random.randint(0, 100000),  # activity_hash
-                np.random.randint(0, 100000),  # category_hash
-                np.random.choice([0, 1], p=[0.3, 0.7]),  # is_failure (more failures)
-                np.random.choice([0, 1], p=[0.7, 0.3]),  # is_success
-                np.random.randint(0, 100000),  # identity_hash
-                np.random.choice([0, 1], p=[0.3, 0.7]),  # has_identity
-                np.random.uniform(0.0, 0.8),  # sql_injection_score
-                np.random.uniform(0.0, 0.7),  # xss_score
-                np.random.uniform(0.0, 0.6),  # path_traversal_score
-                np.random.uniform(0.0, 0.7),  # command_injection_score
-                np.random.uniform(0.0, 0.6),  # code_execution_score
-                np.random.uniform(0.3, 0.9),  # overall_malicious_score
-                np.random.randint(200, 1000),  # message_length (longer, more complex)
-                np.random.randint(50, 200),  # num_special_chars (more special chars)
-                np.random.uniform(4.5, 7.0),  # entropy (higher entropy)
-            ]
-            samples.append(sample)
+    def _generate_suspicious_samples(self, out: np.ndarray) -> None:
+        """Fill out with suspicious traffic samples, one column at a time"""
+        n = len(out)
+        rng = self._rng
         
-        return np.array(samples)
+        # hour (off-hours): early morning or late night with equal odds
+        out[:, 0] = np.where(
+            rng.random(n) < 0.5,
+            rng.integers(0, 6, n),
+            rng.integers(22, 24, n)
+        )
+        out[:, 1] = rng.integers(0, 7, n)  # day_of_week
+        out[:, 2] = rng.random(n) < 0.5  # is_weekend
+        out[:, 3] = 0  # is_business_hours
+        out[:, 4] = 1  # is_night
+        out[:, 5] = rng.integers(0, 100000, n)  # ip_address_hash
+        out[:, 6] = rng.random(n) < 0.7  # is_private_ip (more external)
+        out[:, 7] = rng.uniform(0.1, 0.4, n)  # ip_reputation_score (low reputation)
+        out[:, 8] = rng.random(n) < 0.7  # is_suspicious_agent
+        out[:, 9] = rng.integers(20, 100, n)  # user_agent_length (shorter)
+        out[:, 10] = rng.integers(0, 100000, n)  # event_id_hash
+        out[:, 11] = rng.integers(0, 100000, n)  # activity_hash
+        out[:, 12] = rng.integers(0, 100000, n)  # category_hash
+        out[:, 13] = rng.random(n) < 0.7  # is_failure (more failures)
+        out[:, 14] = rng.random(n) < 0.3  # is_success
+        out[:, 15] = rng.integers(0, 100000, n)  # identity_hash
+        out[:, 16] = rng.random(n) < 0.7  # has_identity
+        out[:, 17] = rng.uniform(0.0, 0.8, n)  # sql_injection_score
+        out[:, 18] = rng.uniform(0.0, 0.7, n)  # xss_score
+        out[:, 19] = rng.uniform(0.0, 0.6, n)  # path_traversal_score
+        out[:, 20] = rng.uniform(0.0, 0.7, n)  # command_injection_score
+        out[:, 21] = rng.uniform(0.0, 0.6, n)  # code_execution_score
+        out[:, 22] = rng.uniform(0.3, 0.9, n)  # overall_malicious_score
+        out[:, 23] = rng.integers(200, 1000, n)  # message_length (longer, more complex)
+        out[:, 24] = rng.integers(50, 200, n)  # num_special_chars (more special chars)
+        out[:, 25] = rng.uniform(4.5, 7.0, n)  # entropy (higher entropy)
     
     def get_feature_names(self) -> list:
         """Get feature names for the generated data"""
-        return [
-            'hour', 'day_of_week', 'is_weekend', 'is_business_hours', 'is_night',
-            'ip_address_hash', 'is_private_ip', 'ip_reputation_score',
-            'is_suspicious_agent', 'user_agent_length',
-            'event_id_hash', 'activity_hash', 'category_hash',
-            'is_failure', 'is_success', 'identity_hash', 'has_identity',
-            'sql_injection_score', 'xss_score', 'path_traversal_score',
-            'command_injection_score', 'code_execution_score', 'overall_malicious_score',
-            'message_length', 'num_special_chars', 'entropy'
-        ]
+        return list(FEATURE_NAMES)
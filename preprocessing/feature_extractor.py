@@ -2,13 +2,88 @@
 Feature extraction and engineering for security log data.
 """
 import re
-import hashlib
+import zlib
+from collections import Counter
+from functools import lru_cache
+from math import log2
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 from loguru import logger
 import numpy as np
 
 
+# Byte values of the ASCII letters and digits (what str.isalnum accepts in
+# ASCII text)
+_ASCII_ALNUM = np.array([chr(b).isalnum() for b in range(128)])
+
+# Values repeat heavily across events (same IPs, agents, categories), so the
+# per-value helpers below are memoized with bounded caches
+
+@lru_cache(maxsize=65536)
+def _hash_value(value: str) -> int:
+    """Hash string value to numeric representation"""
+    if not value or value == 'unknown':
+        return 0
+    # Only a stable bucket is needed, not a cryptographic digest
+    return zlib.crc32(value.encode()) % 1000000
+
+
+@lru_cache(maxsize=16384)
+def _is_private_ip(ip: str) -> int:
+    """Check if IP address is private"""
+    try:
+        octets = ip.split('.')
+        if len(octets) != 4:
+            return 0
+        
+        first = int(octets[0])
+        second = int(octets[1])
+        
+        if first == 10:
+            return 1
+        if first == 172 and 16 <= second <= 31:
+            return 1
+        if first == 192 and second == 168:
+            return 1
+        
+        return 0
+    except:
+        return 0
+
+
+@lru_cache(maxsize=16384)
+def _get_ip_reputation(ip: str) -> float:
+    """Get IP reputation score (simplified version)"""
+    # In production, integrate with threat intelligence feeds
+    # For now, use simple heuristics: private IPs get a better score
+    return 0.9 if _is_private_ip(ip) else 0.5
+
+
+@lru_cache(maxsize=4096)
+def _check_suspicious_agent(user_agent: str) -> int:
+    """Check if user agent is suspicious"""
+    user_agent_lower = user_agent.lower()
+    for agent in FeatureExtractor.SUSPICIOUS_AGENTS:
+        if agent in user_agent_lower:
+            return 1
+    return 0
+
+
+# Model input columns, in the order the detector was trained on. Feature
+# extraction also yields source, timestamp and num_fields, which are not
+# model inputs
+FEATURE_NAMES = (
+    'hour', 'day_of_week', 'is_weekend', 'is_business_hours', 'is_night',
+    'ip_address_hash', 'is_private_ip', 'ip_reputation_score',
+    'is_suspicious_agent', 'user_agent_length',
+    'event_id_hash', 'activity_hash', 'category_hash',
+    'is_failure', 'is_success', 'identity_hash', 'has_identity',
+    'sql_injection_score', 'xss_score', 'path_traversal_score',
+    'command_injection_score', 'code_execution_score', 'overall_malicious_score',
+    'message_length', 'num_special_chars', 'entropy'
+)
+
+
 class FeatureExtractor:
     """Extracts features from raw security logs for ML analysis"""
     
@@ -21,12 +96,47 @@ class FeatureExtractor:
         r'(?i)(base64_decode|eval\(|system\()',  # Code execution
     ]
     
+    # The literal strings the patterns above alternate between (each pattern
+    # is '(?i)(a|b|...)'). A plain substring check for all of them is much
+    # cheaper than the regex scans and lets events that can't match any
+    # pattern (the common case) skip those scans entirely
+    _MALICIOUS_TOKENS = tuple(
+        re.sub(r'\\(.)', r'\1', token)
+        for pattern in MALICIOUS_PATTERNS
+        for token in pattern[len('(?i)('):-1].split('|')
+    )
+    
+    # Compiled once at class load. The patterns only alternate between
+    # lower-case literals, so on lower-cased ASCII text the same matches are
+    # found without the (?i) flag, which makes the scans several times
+    # slower; non-ASCII text keeps the case-insensitive forms, whose
+    # Unicode case folding can still match there
+    _COMPILED_PATTERNS = tuple(re.compile(pattern) for pattern in MALICIOUS_PATTERNS)
+    _ASCII_PATTERNS = tuple(re.compile(pattern[len('(?i)'):]) for pattern in MALICIOUS_PATTERNS)
+    
+    _PATTERN_FEATURES = (
+        'sql_injection_score', 'xss_score', 'path_traversal_score',
+        'command_injection_score', 'code_execution_score'
+    )
+    
+    # Numeric values returned by _event_values after source, timestamp and
+    # message text (the character statistics are computed for the whole
+    # batch from the texts)
+    _EVENT_COLUMNS = (
+        'hour', 'day_of_week',
+        'ip_address_hash', 'is_private_ip', 'ip_reputation_score',
+        'is_suspicious_agent', 'user_agent_length',
+        'event_id_hash', 'activity_hash', 'category_hash',
+        'is_failure', 'is_success', 'identity_hash', 'has_identity',
+    ) + _PATTERN_FEATURES + (
+        'message_length', 'num_fields'
+    )
+    
     # Suspicious user agents
     SUSPICIOUS_AGENTS = ['bot', 'crawler', 'scanner', 'sqlmap', 'nikto', 'nmap']
     
     def __init__(self):
         """Initialize feature extractor"""
-        self.ip_cache = {}
         self.user_cache = {}
     
     def extract_features(self, log_event: Dict) -> Dict[str, Any]:
@@ -39,221 +149,148 @@ class FeatureExtractor:
         Returns:
             Dictionary containing extracted features
         """
-        try:
-            features = {}
-            
-            # Basic features
-            features['source'] = log_event.get('source', 'unknown')
-            features['timestamp'] = log_event.get('timestamp', '')
-            
-            # Temporal features
-            features.update(self._extract_temporal_features(log_event))
-            
-            # Network features
-            features.update(self._extract_network_features(log_event))
-            
-            # Event-based features
-            features.update(self._extract_event_features(log_event))
-            
-            # Pattern-based features
-            features.update(self._extract_pattern_features(log_event))
-            
-            # Statistical features
-            features.update(self._extract_statistical_features(log_event))
-            
-            return features
+        columns = self.extract_features_batch([log_event])
+        return {
+            name: values[0].item() if isinstance(values, np.ndarray) else values[0]
+            for name, values in columns.items()
+        }
+    
+    def extract_features_batch(self, log_events: List[Dict]) -> Dict[str, Any]:
+        """
+        Extract features from a batch of log events, column by column
+        
+        Per-event work only gathers raw values; the derived temporal flags
+        and the overall malicious score are computed on whole columns, and
+        no per-event feature dict is built.
+        
+        Args:
+            log_events: Raw log event dictionaries
             
-        except Exception as e:
-            logger.error(f"Error extracting features: {e}")
+        Returns:
+            Dictionary mapping each feature name to its column (source and
+            timestamp as lists, the numeric features as NumPy arrays), with one
+            entry per event that could be processed; empty if none could
+        """
+        rows = []
+        for log_event in log_events:
+            try:
+                rows.append(self._event_values(log_event))
+            except Exception as e:
+                logger.error(f"Error extracting features: {e}")
+        
+        if not rows:
             return {}
-    
-    def _extract_temporal_features(self, log_event: Dict) -> Dict:
-        """Extract time-based features"""
-        features = {}
         
-        try:
-            timestamp_str = log_event.get('timestamp', '')
-            if timestamp_str:
-                dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                
-                features['hour'] = dt.hour
-                features['day_of_week'] = dt.weekday()
-                features['is_weekend'] = 1 if dt.weekday() >= 5 else 0
-                features['is_business_hours'] = 1 if 9 <= dt.hour <= 17 else 0
-                features['is_night'] = 1 if dt.hour < 6 or dt.hour > 22 else 0
-            else:
-                features['hour'] = -1
-                features['day_of_week'] = -1
-                features['is_weekend'] = 0
-                features['is_business_hours'] = 0
-                features['is_night'] = 0
-                
-        except Exception as e:
-            logger.debug(f"Error extracting temporal features: {e}")
-            features = {
-                'hour': -1, 'day_of_week': -1, 'is_weekend': 0,
-                'is_business_hours': 0, 'is_night': 0
-            }
+        source, timestamp, message_text, *numeric = zip(*rows)
+        columns = {name: np.array(column) for name, column in zip(self._EVENT_COLUMNS, numeric)}
+        columns['num_special_chars'], columns['entropy'] = self._text_statistics_batch(message_text)
+        
+        hour = columns['hour']
+        day_of_week = columns['day_of_week']
+        columns['is_weekend'] = (day_of_week >= 5).astype(np.int64)
+        columns['is_business_hours'] = ((hour >= 9) & (hour <= 17)).astype(np.int64)
+        # hour is -1 when the timestamp is missing or unparseable
+        columns['is_night'] = ((hour >= 0) & ((hour < 6) | (hour > 22))).astype(np.int64)
         
+        scores = [columns[name] for name in self._PATTERN_FEATURES]
+        columns['overall_malicious_score'] = (
+            scores[0] + scores[1] + scores[2] + scores[3] + scores[4]
+        ) / 5.0
+        
+        features = {'source': list(source), 'timestamp': list(timestamp)}
+        features.update((name, columns[name]) for name in FEATURE_NAMES + ('num_fields',))
         return features
     
-    def _extract_network_features(self, log_event: Dict) -> Dict:
-        """Extract network-related features"""
-        features = {}
-        
+    def _event_values(self, log_event: Dict) -> tuple:
+        """Source, timestamp, message text and the raw _EVENT_COLUMNS values of one event"""
         message = log_event.get('message', {})
-        raw_data = log_event.get('raw_data', {})
         
-        # IP address features
-        ip_address = (
+        # Network: IP address and user agent
+        ip_address = str(
             message.get('ip_address') or 
             message.get('IPAddress') or 
-            raw_data.get('ip_address') or
             'unknown'
         )
-        
-        features['ip_address_hash'] = self._hash_value(str(ip_address))
-        features['is_private_ip'] = self._is_private_ip(str(ip_address))
-        features['ip_reputation_score'] = self._get_ip_reputation(str(ip_address))
-        
-        # User agent features
-        user_agent = message.get('user_agent', '') or message.get('UserAgent', '')
-        features['is_suspicious_agent'] = self._check_suspicious_agent(user_agent)
-        features['user_agent_length'] = len(str(user_agent))
-        
-        return features
-    
-    def _extract_event_features(self, log_event: Dict) -> Dict:
-        """Extract event-specific features"""
-        features = {}
-        
-        message = log_event.get('message', {})
-        raw_data = log_event.get('raw_data', {})
+        user_agent = str(message.get('user_agent', '') or message.get('UserAgent', ''))
         
         # Event type and category
         event_id = str(log_event.get('event_id', '') or message.get('EventID', 'unknown'))
         activity = log_event.get('activity', '') or message.get('Activity', '')
         category = log_event.get('category', '') or message.get('Category', 'unknown')
         
-        features['event_id_hash'] = self._hash_value(event_id)
-        features['activity_hash'] = self._hash_value(str(activity))
-        features['category_hash'] = self._hash_value(str(category))
-        
-        # Result/Status features
-        result_type = (
+        # Result/Status
+        result_type = str(
             log_event.get('result_type') or 
             message.get('ResultType') or 
             message.get('Status') or
             'unknown'
-        )
-        features['is_failure'] = 1 if 'fail' in str(result_type).lower() else 0
-        features['is_success'] = 1 if 'success' in str(result_type).lower() else 0
+        ).lower()
         
-        # Identity features
+        # Identity
         identity = log_event.get('identity', '') or message.get('Identity', '')
-        features['identity_hash'] = self._hash_value(str(identity))
-        features['has_identity'] = 1 if identity else 0
-        
-        return features
-    
-    def _extract_pattern_features(self, log_event: Dict) -> Dict:
-        """Extract pattern-based security features"""
-        features = {}
-        
-        # Convert entire log event to string for pattern matching
-        log_str = str(log_event).lower()
-        
-        # Check for malicious patterns
-        features['sql_injection_score'] = self._check_pattern(log_str, self.MALICIOUS_PATTERNS[0])
-        features['xss_score'] = self._check_pattern(log_str, self.MALICIOUS_PATTERNS[1])
-        features['path_traversal_score'] = self._check_pattern(log_str, self.MALICIOUS_PATTERNS[2])
-        features['command_injection_score'] = self._check_pattern(log_str, self.MALICIOUS_PATTERNS[3])
-        features['code_execution_score'] = self._check_pattern(log_str, self.MALICIOUS_PATTERNS[4])
-        
-        # Overall malicious score
-        features['overall_malicious_score'] = sum([
-            features['sql_injection_score'],
-            features['xss_score'],
-            features['path_traversal_score'],
-            features['command_injection_score'],
-            features['code_execution_score']
-        ]) / 5.0
-        
-        return features
-    
-    def _extract_statistical_features(self, log_event: Dict) -> Dict:
-        """Extract statistical features"""
-        features = {}
-        
-        message = log_event.get('message', {})
         
         # Message complexity
         message_str = str(message)
-        features['message_length'] = len(message_str)
-        features['num_special_chars'] = sum(1 for c in message_str if not c.isalnum())
-        features['entropy'] = self._calculate_entropy(message_str)
-        
-        # Field count
-        features['num_fields'] = len(message) if isinstance(message, dict) else 0
         
-        return features
-    
-    def _hash_value(self, value: str) -> int:
-        """Hash string value to numeric representation"""
-        if not value or value == 'unknown':
-            return 0
-        return int(hashlib.md5(value.encode()).hexdigest()[:8], 16) % 1000000
+        return (
+            log_event.get('source', 'unknown'),
+            log_event.get('timestamp', ''),
+            message_str,
+            *self._hour_and_weekday(log_event.get('timestamp', '')),
+            _hash_value(ip_address),
+            _is_private_ip(ip_address),
+            _get_ip_reputation(ip_address),
+            _check_suspicious_agent(user_agent),
+            len(user_agent),
+            _hash_value(event_id),
+            _hash_value(str(activity)),
+            _hash_value(str(category)),
+            1 if 'fail' in result_type else 0,
+            1 if 'success' in result_type else 0,
+            _hash_value(str(identity)),
+            1 if identity else 0,
+            *self._pattern_scores(log_event),
+            len(message_str),
+            len(message) if isinstance(message, dict) else 0,
+        )
     
-    def _is_private_ip(self, ip: str) -> int:
-        """Check if IP address is private"""
+    def _hour_and_weekday(self, timestamp) -> tuple:
+        """Hour and weekday of an event timestamp, or (-1, -1) if unavailable"""
+        if not timestamp:
+            return -1, -1
+        
         try:
-            octets = ip.split('.')
-            if len(octets) != 4:
-                return 0
-            
-            first = int(octets[0])
-            second = int(octets[1])
-            
-            if first == 10:
-                return 1
-            if first == 172 and 16 <= second <= 31:
-                return 1
-            if first == 192 and second == 168:
-                return 1
-            
-            return 0
-        except:
-            return 0
+            # Azure events carry a parsed datetime, others an ISO string
+            if isinstance(timestamp, datetime):
+                dt = timestamp
+            else:
+                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+            return dt.hour, dt.weekday()
+        except Exception as e:
+            logger.debug(f"Error extracting temporal features: {e}")
+            return -1, -1
     
-    def _get_ip_reputation(self, ip: str) -> float:
-        """Get IP reputation score (simplified version)"""
-        # In production, integrate with threat intelligence feeds
-        # For now, use simple heuristics
-        
-        if ip in self.ip_cache:
-            return self.ip_cache[ip]
-        
-        score = 0.5  # Neutral score
+    def _pattern_scores(self, log_event: Dict) -> tuple:
+        """Match scores of the malicious patterns, in _PATTERN_FEATURES order"""
+        # Convert entire log event to string for pattern matching
+        log_str = str(log_event).lower()
         
-        # Private IPs get better score
-        if self._is_private_ip(ip):
-            score = 0.9
+        # The token prefilter and the case-sensitive scans are only exact for
+        # ASCII: case-insensitive regexes also match some non-ASCII letters
+        # (e.g. U+017F for 's')
+        if log_str.isascii():
+            if not any(token in log_str for token in self._MALICIOUS_TOKENS):
+                return (0.0,) * len(self.MALICIOUS_PATTERNS)
+            patterns = self._ASCII_PATTERNS
+        else:
+            patterns = self._COMPILED_PATTERNS
         
-        self.ip_cache[ip] = score
-        return score
+        return tuple(self._check_pattern(log_str, pattern) for pattern in patterns)
     
-    def _check_suspicious_agent(self, user_agent: str) -> int:
-        """Check if user agent is suspicious"""
-        user_agent_lower = str(user_agent).lower()
-        for agent in self.SUSPICIOUS_AGENTS:
-            if agent in user_agent_lower:
-                return 1
-        return 0
-    
-    def _check_pattern(self, text: str, pattern: str) -> float:
+    def _check_pattern(self, text: str, pattern: re.Pattern) -> float:
         """Check for pattern matches and return score"""
         try:
-            matches = re.findall(pattern, text)
+            matches = pattern.findall(text)
             return min(len(matches) / 10.0, 1.0)  # Normalize to 0-1
         except:
             return 0.0
@@ -263,19 +300,61 @@ class FeatureExtractor:
         if not text:
             return 0.0
         
-        try:
-            # Calculate frequency of each character
-            freq = {}
-            for char in text:
-                freq[char] = freq.get(char, 0) + 1
+        length = len(text)
+        
+        # Short or non-ASCII text: count characters directly (for ASCII the
+        # byte histogram below is the character histogram, and for short
+        # strings NumPy's call overhead outweighs the loop)
+        if length < 32 or not text.isascii():
+            return sum(count / length * log2(length / count)
+                       for count in Counter(text).values())
+        
+        counts = np.bincount(np.frombuffer(text.encode('ascii'), dtype=np.uint8))
+        counts = counts[counts > 0]
+        return float(np.sum(counts / length * np.log2(length / counts)))
+    
+    def _text_statistics_batch(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate the special character count and Shannon entropy of each
+        text in a batch
+        
+        ASCII texts are histogrammed together: their bytes are packed into
+        one buffer and counted with a single bincount over (row, byte) bins,
+        and both statistics are read off that histogram, so the per-text
+        NumPy call overhead is paid once per batch.
+        
+        Args:
+            texts: Texts to measure
             
-            # Calculate entropy
-            entropy = 0.0
-            length = len(text)
-            for count in freq.values():
-                p = count / length
-                entropy -= p * np.log2(p)
+        Returns:
+            Tuple of (special character counts, entropies), one per text
+        """
+        num_special = np.empty(len(texts), dtype=np.int64)
+        entropy = np.empty(len(texts))
+        
+        ascii_rows = []
+        for i, text in enumerate(texts):
+            if text.isascii():
+                ascii_rows.append(i)
+            else:
+                # str.isalnum also accepts non-ASCII letters and digits
+                num_special[i] = sum(1 for c in text if not c.isalnum())
+                entropy[i] = self._calculate_entropy(text)
+        
+        if ascii_rows:
+            ascii_texts = [texts[i] for i in ascii_rows]
+            lengths = np.array([len(text) for text in ascii_texts])
+            data = np.frombuffer(''.join(ascii_texts).encode('ascii'), dtype=np.uint8)
             
-            return entropy
-        except:
-            return 0.0
+            bins = np.repeat(np.arange(len(ascii_texts)) * 128, lengths) + data
+            counts = np.bincount(bins, minlength=len(ascii_texts) * 128).reshape(-1, 128)
+            
+            num_special[ascii_rows] = lengths - counts[:, _ASCII_ALNUM].sum(axis=1)
+            
+            # Empty bins (and empty texts) contribute nothing
+            lengths = lengths[:, None]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                terms = np.where(counts > 0, counts / lengths * np.log2(lengths / counts), 0.0)
+            entropy[ascii_rows] = terms.sum(axis=1)
+        
+        return num_special, entropy
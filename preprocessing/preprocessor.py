@@ -5,7 +5,11 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Any
 from loguru import logger
-from preprocessing.feature_extractor import FeatureExtractor
+from preprocessing.feature_extractor import FEATURE_NAMES, FeatureExtractor
+
+
+# Numeric columns of the normalized frame that are not model features
+_EXCLUDED_COLUMNS = ('timestamp',)
 
 
 class LogPreprocessor:
@@ -26,24 +30,15 @@ class LogPreprocessor:
         Returns:
             Normalized pandas DataFrame
         """
-        if not raw_logs:
-            logger.warning("No logs to normalize")
+        features = self._extract_columns(raw_logs)
+        
+        if not features:
             return pd.DataFrame()
         
         try:
-            # Extract features from each log
-            processed_logs = []
-            for log in raw_logs:
-                features = self.feature_extractor.extract_features(log)
-                if features:
-                    processed_logs.append(features)
-            
-            if not processed_logs:
-                logger.warning("No features extracted from logs")
-                return pd.DataFrame()
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(processed_logs)
+            # The columns are fresh arrays owned by nobody else, so the frame
+            # can take them over instead of copying
+            df = pd.DataFrame(features, copy=False)
             
             logger.info(f"Normalized {len(df)} log entries with {len(df.columns)} features")
             return df
@@ -52,81 +47,182 @@ class LogPreprocessor:
             logger.error(f"Error normalizing logs: {e}")
             return pd.DataFrame()
     
-    def prepare_for_ml(self, df: pd.DataFrame, training: bool = False) -> np.ndarray:
+    def _extract_columns(self, raw_logs: List[Dict]) -> Dict[str, Any]:
+        """
+        Extract the features of a batch of logs as named columns
+        
+        Args:
+            raw_logs: List of raw log dictionaries
+            
+        Returns:
+            Feature name to column mapping (empty if nothing was extracted)
+        """
+        if not raw_logs:
+            logger.warning("No logs to normalize")
+            return {}
+        
+        try:
+            # Features are extracted column-wise for the whole batch, and
+            # frames and matrices are built from those columns rather than
+            # from row dicts
+            features = self.feature_extractor.extract_features_batch(raw_logs)
+            
+            if not features:
+                logger.warning("No features extracted from logs")
+            return features
+            
+        except Exception as e:
+            logger.error(f"Error normalizing logs: {e}")
+            return {}
+    
+    def prepare_for_ml(self, df: pd.DataFrame, training: bool = False,
+                       out: np.ndarray = None) -> np.ndarray:
         """
         Prepare normalized logs for ML model input
         
         Args:
             df: Normalized DataFrame
             training: Whether this is for training (stores feature columns)
+            out: Optional preallocated (rows, features) buffer to write into;
+                ignored if it doesn't fit the batch
             
         Returns:
-            NumPy array ready for ML model
+            float32 NumPy array ready for ML model (a view of out, in its
+            dtype, when it was used)
         """
         if df.empty:
             return np.array([])
         
         try:
-            # Select numeric features only
-            numeric_features = df.select_dtypes(include=[np.number])
-            
-            # Remove timestamp and source columns if they exist
-            exclude_cols = ['timestamp']
-            numeric_features = numeric_features.drop(
-                columns=[col for col in exclude_cols if col in numeric_features.columns],
-                errors='ignore'
-            )
-            
             if training:
-                # Store feature columns for consistency
-                self.feature_columns = numeric_features.columns.tolist()
+                # Numeric features only, without the timestamp (numeric when
+                # given as epoch values); the frame is subset once from the
+                # resulting names instead of selected and then dropped from
+                self.feature_columns = [
+                    col for col in df.select_dtypes(include=[np.number]).columns
+                    if col not in _EXCLUDED_COLUMNS
+                ]
+                numeric_features = df[self.feature_columns]
                 logger.info(f"Stored {len(self.feature_columns)} feature columns for ML")
             else:
-                # Ensure same features as training
-                if self.feature_columns:
-                    # Add missing columns with zeros
-                    for col in self.feature_columns:
-                        if col not in numeric_features.columns:
-                            numeric_features[col] = 0
-                    
-                    # Remove extra columns
-                    numeric_features = numeric_features[self.feature_columns]
-            
-            # Handle missing values
-            numeric_features = numeric_features.fillna(0)
-            
-            # Handle infinite values
-            numeric_features = numeric_features.replace([np.inf, -np.inf], 0)
+                # Ensure same features as training (the detector's input
+                # columns unless training went through this preprocessor).
+                # Those are known to be numeric, so they are picked directly
+                # without inspecting the dtype of every column first
+                feature_columns = self.feature_columns or list(FEATURE_NAMES)
+                
+                # Select and order the columns, adding missing ones as zeros,
+                # in one reindex rather than an insert per missing column
+                numeric_features = df.reindex(columns=feature_columns, fill_value=0)
             
             logger.info(f"Prepared {len(numeric_features)} samples with {len(numeric_features.columns)} features")
-            return numeric_features.values
+            
+            result = None
+            if out is not None:
+                if out.ndim == 2 and out.shape[1] == numeric_features.shape[1] \
+                        and len(out) >= len(numeric_features):
+                    result = out[:len(numeric_features)]
+                    # Converted straight to the buffer's dtype: the frame's
+                    # mixed int/float blocks would otherwise be interleaved
+                    # into a float64 temporary first
+                    np.copyto(result, numeric_features.to_numpy(dtype=result.dtype))
+                else:
+                    logger.debug(f"Feature buffer {out.shape} doesn't fit batch {numeric_features.shape}")
+            
+            if result is None:
+                # float32 is what the forest evaluates on; copied, since a
+                # single-block frame would otherwise hand out its own data
+                # to the in-place cleanup below
+                result = numeric_features.to_numpy(dtype=np.float32, copy=True)
+            
+            # Handle missing and infinite values in one in-place pass over
+            # the array rather than a fillna and a replace over the frame
+            np.nan_to_num(result, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+            
+            return result
             
         except Exception as e:
             logger.error(f"Error preparing data for ML: {e}")
             return np.array([])
     
-    def process_batch(self, raw_logs: List[Dict], training: bool = False) -> tuple:
+    def process_batch(self, raw_logs: List[Dict], training: bool = False,
+                      out: np.ndarray = None) -> tuple:
         """
         Complete preprocessing pipeline for a batch of logs
         
         Args:
             raw_logs: List of raw log dictionaries
             training: Whether this is for training
+            out: Optional preallocated feature buffer reused across batches
             
         Returns:
             Tuple of (feature array, normalized DataFrame)
         """
-        # Normalize logs
-        normalized_df = self.normalize_logs(raw_logs)
+        if training:
+            # Training stores the feature columns from the frame
+            normalized_df = self.normalize_logs(raw_logs)
+            
+            if normalized_df.empty:
+                return np.array([]), normalized_df
+            
+            feature_array = self.prepare_for_ml(normalized_df, training=True, out=out)
+            return feature_array, normalized_df
         
-        if normalized_df.empty:
-            return np.array([]), normalized_df
+        features = self._extract_columns(raw_logs)
         
-        # Prepare for ML
-        feature_array = self.prepare_for_ml(normalized_df, training=training)
+        if not features:
+            return np.array([]), pd.DataFrame()
         
+        # The model input is gathered straight from the extracted columns;
+        # the frame is only built for callers of the normalized logs
+        feature_array = self._feature_matrix(features, out=out)
+        normalized_df = pd.DataFrame(features, copy=False)
+        
+        logger.info(f"Normalized {len(normalized_df)} log entries with {len(normalized_df.columns)} features")
         return feature_array, normalized_df
     
+    def _feature_matrix(self, features: Dict[str, Any], out: np.ndarray = None) -> np.ndarray:
+        """
+        Gather extracted feature columns into the model input matrix
+        
+        Same result as prepare_for_ml on the normalized frame, without the
+        intermediate frames: each model column is copied once into place.
+        
+        Args:
+            features: Feature name to column mapping from the extractor
+            out: Optional preallocated (rows, features) buffer to write into;
+                ignored if it doesn't fit the batch
+            
+        Returns:
+            float32 NumPy array ready for ML model (a view of out, in its
+            dtype, when it was used)
+        """
+        try:
+            feature_columns = self.feature_columns or FEATURE_NAMES
+            shape = (len(features['source']), len(feature_columns))
+            
+            if out is not None and out.ndim == 2 and out.shape[1] == shape[1] \
+                    and len(out) >= shape[0]:
+                result = out[:shape[0]]
+            else:
+                if out is not None:
+                    logger.debug(f"Feature buffer {out.shape} doesn't fit batch {shape}")
+                result = np.empty(shape, dtype=np.float32)
+            
+            for i, col in enumerate(feature_columns):
+                # Columns the extractor didn't produce are zero
+                result[:, i] = features.get(col, 0)
+            
+            # Handle missing and infinite values
+            np.nan_to_num(result, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+            
+            logger.info(f"Prepared {shape[0]} samples with {shape[1]} features")
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error preparing data for ML: {e}")
+            return np.array([])
+    
     def get_feature_names(self) -> List[str]:
         """Get list of feature column names"""
         return self.feature_columns if self.feature_columns else []
@@ -23,7 +23,7 @@ def train_model():
     
     # Train model
     logger.info("Training Random Forest model...")
-    metrics = detector.train(X, y, test_size=0.2)
+    metrics = detector.train(X, y, test_size=0.2, verbose_metrics=True)
     
     # Display results
     logger.info("="*60)